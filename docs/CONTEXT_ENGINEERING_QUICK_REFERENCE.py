@@ -85,8 +85,7 @@ STEP_3_KEY_FILES = [
 
 STEP_3_USAGE = """
 # Methods in EnhancedContextRetriever:
-# - _apply_scope_filtering(results, scope)
-# - _apply_security_filtering(results)
+# - _filter_results(results, scope)  -> (results, security_filtered_count)
 # - _prepare_context_items(results, cg_context, git_context)
 
 # Security filter checks:
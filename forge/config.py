@@ -36,6 +36,16 @@ class ForgeConfig:
     chunk_size: int = 512
     chunk_overlap: int = 50
     
+    # Indexing parallelism (1 = serial; worker processes use spawn, so
+    # scripts that index at import time need an `if __name__ == "__main__"` guard)
+    index_workers: int = 1
+    
+    # Vector search recall/latency preset once an ANN index exists
+    ann_profile: str = "balanced"  # "fast" | "balanced" | "recall"
+    
+    # Keep the in-memory search matrix as int8 codes instead of fp16
+    quantize_vectors: bool = False
+    
     # Context Engineering (Playbook Implementation)
     # Step 1: Context Boundaries
     context_scoping_enabled: bool = True
@@ -76,6 +86,9 @@ class ForgeConfig:
             claude_model=os.getenv("FORGE_CLAUDE_MODEL", "claude-sonnet-4-20250514"),
             openai_api_key=os.getenv("OPENAI_API_KEY", ""),
             openai_model=os.getenv("FORGE_OPENAI_MODEL", "gpt-4o"),
+            index_workers=int(os.getenv("FORGE_INDEX_WORKERS", "1")),
+            ann_profile=os.getenv("FORGE_ANN_PROFILE", "balanced"),
+            quantize_vectors=os.getenv("FORGE_QUANTIZE_VECTORS", "0").lower() in ("1", "true", "yes"),
         )
 
 
@@ -3,8 +3,9 @@
 # Original components
 from .embedder import Embedder
 from .chunker import SemanticChunker, CodeChunk
-from .vector_store import VectorStore, SearchResult
+from .vector_store import VectorStore, SearchResult, SearchResultBatch
 from .retriever import ContextRetriever
+from .embed_cache import EmbeddingCache
 from .call_graph import CallGraph
 from .git_context import GitContext
 
@@ -41,7 +42,9 @@ __all__ = [
     "CodeChunk",
     "VectorStore",
     "SearchResult",
+    "SearchResultBatch",
     "ContextRetriever",
+    "EmbeddingCache",
     "CallGraph",
     "GitContext",
     
@@ -10,10 +10,12 @@ Based on: "Interprocedural Slicing Using Dependence Graphs" (Horwitz et al., 199
 """
 
 from pathlib import Path
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Set, Optional, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 
+from .chunker import iter_source_files
+
 try:
     import tree_sitter_languages
     HAS_TREESITTER = True
@@ -21,6 +23,13 @@ except ImportError:
     HAS_TREESITTER = False
 
 
+# Directories never analyzed (pruned during the walk, not per file)
+_SKIP_DIRS = frozenset({"node_modules", ".git", "__pycache__", "venv", ".venv", "dist", "build"})
+
+# Source file suffixes to analyze
+_SOURCE_EXTS = (".py", ".js", ".ts", ".go", ".rs", ".java")
+
+
 @dataclass
 class Symbol:
     """A code symbol (function, class, method)."""
@@ -75,20 +84,11 @@ class CallGraph:
         self.callees.clear()
         
         # Find all source files
-        extensions = [".py", ".js", ".ts", ".go", ".rs", ".java"]
-        for ext in extensions:
-            for file_path in self.workspace.rglob(f"*{ext}"):
-                if self._should_skip(file_path):
-                    continue
-                self._analyze_file(str(file_path))
+        for file_path in iter_source_files(str(self.workspace), _SOURCE_EXTS, _SKIP_DIRS):
+            self._analyze_file(file_path)
         
         self._built = True
     
-    def _should_skip(self, path: Path) -> bool:
-        """Skip certain directories."""
-        skip_dirs = {"node_modules", ".git", "__pycache__", "venv", ".venv", "dist", "build"}
-        return any(part in skip_dirs for part in path.parts)
-    
     _warned_treesitter = False
 
     def _analyze_file(self, file_path: str):
@@ -190,6 +190,46 @@ class CallGraph:
         """Get all functions called by this symbol."""
         return list(self.callees.get(symbol, set()))
     
+    def get_neighborhood(
+        self, symbols: List[str], depth: int = 1
+    ) -> Dict[str, Tuple[List[str], List[str]]]:
+        """
+        Get transitive callers and callees for several symbols at once.
+        
+        Runs one level-synchronous BFS per direction from the union of
+        roots, so each node's adjacency is looked up once per level no
+        matter how many roots reach it.
+        
+        Returns:
+            {symbol: (callers, callees)}, nearest neighbors first
+        """
+        roots = list(dict.fromkeys(s for s in symbols if s))
+        callers = self._multi_source_bfs(roots, self.callers, depth)
+        callees = self._multi_source_bfs(roots, self.callees, depth)
+        return {root: (callers[root], callees[root]) for root in roots}
+    
+    @staticmethod
+    def _multi_source_bfs(
+        roots: List[str], edges: Dict[str, Set[str]], depth: int
+    ) -> Dict[str, List[str]]:
+        """BFS from every root simultaneously, tracking which roots reach each node."""
+        reached: Dict[str, Dict[str, None]] = {root: {} for root in roots}
+        frontier: Dict[str, Set[str]] = {root: {root} for root in roots}
+        
+        for _ in range(max(depth, 1)):
+            next_frontier: Dict[str, Set[str]] = defaultdict(set)
+            for node, origins in frontier.items():
+                for neighbor in edges.get(node, ()):
+                    for root in origins:
+                        if neighbor != root and neighbor not in reached[root]:
+                            reached[root][neighbor] = None
+                            next_frontier[neighbor].add(root)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        
+        return {root: list(nodes) for root, nodes in reached.items()}
+    
     def get_impact(self, symbol: str, depth: int = 2) -> Set[str]:
         """Get all symbols impacted by changing this one (transitive callers)."""
         impacted = set()
@@ -5,8 +5,9 @@ Chunks code at semantic boundaries (functions, classes) rather than arbitrary sp
 Based on: "CodeSearchNet Challenge" (Husain et al., 2019) - semantic code search.
 """
 
+import os
 from pathlib import Path
-from typing import List, Optional, Generator
+from typing import FrozenSet, Iterator, List, Optional, Generator, Tuple
 from dataclasses import dataclass
 
 try:
@@ -52,6 +53,32 @@ SEMANTIC_NODES = {
 }
 
 
+def iter_source_files(root: str, suffixes: Tuple[str, ...],
+                      skip_dirs: FrozenSet[str]) -> Iterator[str]:
+    """
+    Yield paths of files ending in one of suffixes under root.
+    
+    One os.scandir walk for all suffixes; directories named in skip_dirs
+    are never entered. Directory symlinks are not followed.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in skip_dirs:
+                                stack.append(entry.path)
+                        elif entry.name.endswith(suffixes) and entry.is_file():
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
 class SemanticChunker:
     """
     Chunk code at semantic boundaries using AST parsing.
@@ -0,0 +1,116 @@
+"""
+Persistent embedding cache keyed by chunk content hash.
+
+Re-indexing a codebase mostly re-embeds unchanged code. Caching vectors by
+(model, content hash) on disk means only new or edited chunks reach the
+embedding model, and warm starts skip it entirely.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed {(model, content_hash): vector} store.
+
+    Vectors are stored as float16 blobs, halving the cache size; the
+    precision loss is negligible for cosine similarity.
+    """
+
+    # Stay below SQLite's default bound-parameter limit
+    _BATCH = 500
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazy database connection."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vec BLOB NOT NULL,"
+                " PRIMARY KEY (model, hash))"
+            )
+        return self._conn
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """Stable hash of chunk content (xxh64 when available, else sha1)."""
+        data = text.encode("utf-8", errors="ignore")
+        if HAS_XXHASH:
+            return xxhash.xxh64(data).hexdigest()
+        return hashlib.sha1(data).hexdigest()
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for whichever hashes are present."""
+        hashes = list(hashes)
+        found: Dict[str, List[float]] = {}
+
+        try:
+            with self._lock:
+                for i in range(0, len(hashes), self._BATCH):
+                    batch = hashes[i:i + self._BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self.conn.execute(
+                        f"SELECT hash, vec FROM embeddings"
+                        f" WHERE model = ? AND hash IN ({placeholders})",
+                        [model, *batch],
+                    )
+                    for h, blob in rows:
+                        found[h] = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+        except sqlite3.Error as e:
+            print(f"Embedding cache error: {e}")
+
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        """Store vectors by content hash, skipping empty (failed) embeddings."""
+        rows = [
+            (model, h, len(vec), np.asarray(vec, dtype=np.float16).tobytes())
+            for h, vec in vectors.items()
+            if vec
+        ]
+        if not rows:
+            return
+
+        try:
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, dim, vec)"
+                    " VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+        except sqlite3.Error as e:
+            print(f"Embedding cache error: {e}")
+
+    def clear(self):
+        """Drop all cached vectors."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM embeddings")
+
+    def close(self):
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
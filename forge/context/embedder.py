@@ -76,10 +76,18 @@ class Embedder:
 
     @property
     def dimension(self) -> int:
-        """Get embedding dimension (lazily determined)."""
+        """Get embedding dimension (lazily determined from model metadata)."""
         if self._dimension is None:
-            test = self.embed("test")
-            self._dimension = len(test) if test else 384
+            if self.provider == "sentence-transformers":
+                dim = self._dimension_st()
+            else:
+                dim = self._dimension_ollama()
+            
+            if not dim:
+                # Metadata unavailable - fall back to a probe embedding
+                test = self.embed("test")
+                dim = len(test) if test else 384
+            self._dimension = dim
         return self._dimension
 
     def check_connection(self) -> bool:
@@ -121,6 +129,13 @@ class Embedder:
             print(f"⚠️  Batch embedding error (sentence-transformers): {e}")
             return [[] for _ in texts]
 
+    def _dimension_st(self) -> Optional[int]:
+        """Read the output dimension from the loaded model (no inference)."""
+        try:
+            return self._get_st_model().get_sentence_embedding_dimension()
+        except Exception:
+            return None
+
     def _check_connection_st(self) -> bool:
         """Check if sentence-transformers is loadable."""
         try:
@@ -150,6 +165,26 @@ class Embedder:
             print(f"⚠️  Embedding error (is Ollama running at {self.base_url}?): {e}")
             return []
 
+    def _dimension_ollama(self) -> Optional[int]:
+        """Read embedding_length from Ollama's /api/show model metadata."""
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/show",
+                json={"name": self.model},
+                timeout=5,
+            )
+            response.raise_for_status()
+            info = response.json()
+        except Exception:
+            return None
+
+        # Reported as "<architecture>.embedding_length" in model_info
+        for key, value in (info.get("model_info") or {}).items():
+            if key.endswith(".embedding_length"):
+                return int(value)
+        value = (info.get("details") or {}).get("embedding_length")
+        return int(value) if value else None
+
     def _check_connection_ollama(self) -> bool:
         """Check if Ollama is available."""
         try:
@@ -16,14 +16,20 @@ This is the complete implementation of the context engineering playbook.
 from pathlib import Path
 from typing import List, Optional, Dict, Tuple
 from dataclasses import dataclass
+import hashlib
+import json
+import math
+import os
 import time
 
+import numpy as np
+
 from forge.config import config
 from forge.agent.prompt_enhancer import QueryIntent
 
 from .embedder import Embedder
-from .chunker import SemanticChunker, CodeChunk
-from .vector_store import VectorStore, SearchResult
+from .chunker import SemanticChunker, CodeChunk, iter_source_files
+from .vector_store import VectorStore, SearchResult, SearchResultBatch
 from .call_graph import CallGraph
 from .git_context import GitContext
 
@@ -41,7 +47,17 @@ from .window_optimizer import (
 )
 
 
-@dataclass
+# Directories never indexed (pruned during the walk, not per file)
+_SKIP_DIRS = frozenset({
+    "node_modules", ".git", "__pycache__", "venv", ".venv",
+    "dist", "build", ".forge", "target", ".gradle",
+})
+
+# Source file suffixes to index
+_SOURCE_EXTS = (".py", ".js", ".ts", ".tsx", ".go", ".rs", ".java", ".cpp", ".c")
+
+
+@dataclass(slots=True)
 class EnhancedContext:
     """Enhanced context with quality metrics and routing info."""
     semantic_results: List[SearchResult]
@@ -81,7 +97,8 @@ class EnhancedContextRetriever:
             overlap=config.chunk_overlap,
         )
         self.vector_store = VectorStore(
-            str(self.workspace / ".forge" / "vectors")
+            str(self.workspace / ".forge" / "vectors"),
+            ann_profile=config.ann_profile,
         )
         self.call_graph = CallGraph(workspace)
         self.git = GitContext(workspace)
@@ -96,41 +113,103 @@ class EnhancedContextRetriever:
         self._retrieval_cache: Dict[str, EnhancedContext] = {}
     
     def index(self, force: bool = False):
-        """Index the codebase for semantic search."""
+        """
+        Index the codebase for semantic search.
+        
+        Incremental: a manifest of (mtime_ns, sha1) per file lets unchanged
+        files be skipped, so only new or edited files are re-chunked and
+        re-embedded. force=True rebuilds everything.
+        """
         if self._indexed and not force:
             return
         
         if force:
             self.vector_store.clear()
         
+        # A manifest is only meaningful while the store still has its rows
+        manifest = {} if force or self.vector_store.count() == 0 else self._load_manifest()
+        
         # Find all source files
-        extensions = [".py", ".js", ".ts", ".tsx", ".go", ".rs", ".java", ".cpp", ".c"]
         all_chunks: List[CodeChunk] = []
         security_filtered = 0
+        seen: set = set()
+        stale: List[str] = []
+        updated: Dict[str, Dict] = {}
+        
+        for path in iter_source_files(str(self.workspace), _SOURCE_EXTS, _SKIP_DIRS):
+            # Security filtering
+            if self.security_filter.is_sensitive_file(path):
+                security_filtered += 1
+                continue
+            
+            seen.add(path)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            
+            entry = manifest.get(path)
+            if entry and entry["mtime_ns"] == mtime_ns:
+                continue
+            
+            try:
+                with open(path, "rb") as f:
+                    sha1 = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                continue
+            
+            if entry and entry["sha1"] == sha1:
+                # Touched but not edited
+                entry["mtime_ns"] = mtime_ns
+                continue
+            
+            if entry:
+                stale.append(path)
+            
+            chunks = self.chunker.chunk_file(path)
+            all_chunks.extend(chunks)
+            updated[path] = {"mtime_ns": mtime_ns, "sha1": sha1, "chunks": len(chunks)}
+        
+        # Files deleted since the last run
+        removed = [path for path in manifest if path not in seen]
+        for path in removed:
+            del manifest[path]
+        
+        self.vector_store.delete_files(stale + removed)
         
-        for ext in extensions:
-            for file_path in self.workspace.rglob(f"*{ext}"):
-                if self._should_skip(file_path):
-                    continue
-                
-                # Security filtering
-                if self.security_filter.is_sensitive_file(str(file_path)):
-                    security_filtered += 1
-                    continue
-                
-                chunks = self.chunker.chunk_file(str(file_path))
-                all_chunks.extend(chunks)
-        
-        if not all_chunks:
+        if not all_chunks and not manifest:
             print(f"Warning: No code chunks to index ({security_filtered} filtered for security)")
             return
         
-        # Generate embeddings and store
-        texts = [c.content for c in all_chunks]
-        embeddings = self.embedder.embed_batch(texts)
-        
-        added = self.vector_store.add_chunks(all_chunks, embeddings)
-        print(f"Indexed {added} code chunks (filtered {security_filtered} sensitive files)")
+        if all_chunks:
+            # Generate embeddings for changed files only and store;
+            # identical chunks (license headers, boilerplate) embed once
+            unique: Dict[str, int] = {}
+            order = [unique.setdefault(c.content, len(unique)) for c in all_chunks]
+            unique_embeddings = self.embedder.embed_batch(list(unique))
+            embeddings = [unique_embeddings[i] for i in order]
+            
+            # The ANN index is (re)trained once below, not on insert
+            added = self.vector_store.add_chunks(
+                all_chunks, embeddings, binary=True, build_index=False,
+            )
+            print(f"Indexed {added} code chunks from {len(updated)} changed files "
+                  f"(filtered {security_filtered} sensitive files)")
+            if added:
+                manifest.update(updated)
+        else:
+            print(f"Index up to date ({len(manifest)} files)")
+        
+        self._save_manifest(manifest)
+        
+        # Sub-linear search for large stores (no-op below ANN_MIN_ROWS);
+        # only retrain when the indexed rows changed
+        total = self.vector_store.count()
+        if total >= VectorStore.ANN_MIN_ROWS:
+            nlist = min(4096, int(4 * math.sqrt(total)))
+            changed = bool(all_chunks or stale or removed)
+            if self.vector_store.build_ann(metric="ip", nlist=nlist, replace=changed) and changed:
+                print(f"Built ANN index: {nlist} partitions")
         
         # Build call graph
         if config.enable_call_graph:
@@ -139,13 +218,25 @@ class EnhancedContextRetriever:
         
         self._indexed = True
     
-    def _should_skip(self, path: Path) -> bool:
-        """Skip certain directories."""
-        skip_dirs = {
-            "node_modules", ".git", "__pycache__", "venv", ".venv",
-            "dist", "build", ".forge", "target", ".gradle"
-        }
-        return any(part in skip_dirs for part in path.parts)
+    @property
+    def _manifest_path(self) -> Path:
+        return self.vector_store.db_path / "manifest.json"
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Load {file_path: {mtime_ns, sha1, chunks}} from the last index run."""
+        try:
+            return json.loads(self._manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_manifest(self, manifest: Dict[str, Dict]):
+        """Persist the index manifest atomically."""
+        tmp = self._manifest_path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(manifest), encoding="utf-8")
+            os.replace(tmp, self._manifest_path)
+        except OSError as e:
+            print(f"Warning: could not save index manifest: {e}")
     
     def retrieve(
         self,
@@ -168,21 +259,55 @@ class EnhancedContextRetriever:
         
         # Step 1: Analyze query complexity and intent
         query_analysis = self.complexity_router.analyze_query(query, intent)
-        context_scope = query_analysis.context_scope
         
         # Step 2-3: Retrieve and filter by context scope
         semantic_results = self._retrieve_semantic(
-            query, context_scope, max_results
+            query, query_analysis.context_scope, max_results
         )
         
-        # Step 3: Additional filtering for scope
-        semantic_results = self._apply_scope_filtering(
-            semantic_results, context_scope
-        )
+        return self._build_context(query, query_analysis, semantic_results, start_time)
+    
+    def retrieve_many(
+        self,
+        queries: List[str],
+        intent: QueryIntent = QueryIntent.GENERAL,
+        max_results: int = 5,
+    ) -> List[EnhancedContext]:
+        """
+        Retrieve context for several queries at once.
         
-        # Step 3: Security filtering
-        semantic_results, security_filtered = self._apply_security_filtering(
-            semantic_results
+        Queries are embedded in one batch and searched with a single
+        multi-vector store query; the per-query steps then run as in
+        retrieve(). Results line up with queries.
+        """
+        start_time = time.time()
+        
+        analyses = [self.complexity_router.analyze_query(q, intent) for q in queries]
+        embeddings = self.embedder.embed_batch(list(queries))
+        batches = self._search_semantic_many(embeddings, max_results)
+        
+        return [
+            self._build_context(
+                query, analysis,
+                self._scope_semantic(batch, analysis.context_scope, max_results),
+                start_time,
+            )
+            for query, analysis, batch in zip(queries, analyses, batches)
+        ]
+    
+    def _build_context(
+        self,
+        query: str,
+        query_analysis: QueryAnalysis,
+        semantic_results: SearchResultBatch,
+        start_time: float,
+    ) -> EnhancedContext:
+        """Steps 3-6 of retrieve() for already-searched semantic results."""
+        context_scope = query_analysis.context_scope
+        
+        # Step 3: Scope and security filtering
+        semantic_results, security_filtered = self._filter_results(
+            semantic_results, context_scope
         )
         
         # Step 2-4: Get call graph context based on strategy
@@ -206,9 +331,7 @@ class EnhancedContextRetriever:
             )
         
         # Step 5: Calculate token budget
-        system_prompt_tokens = TokenCounter.estimate_tokens(
-            _SYSTEM_PROMPT, "word"
-        )
+        system_prompt_tokens = _SYSTEM_PROMPT_TOKENS
         query_tokens = TokenCounter.estimate_tokens(query, "word")
         token_budget = self.window_optimizer.allocate_budget(
             system_prompt_tokens,
@@ -257,61 +380,91 @@ class EnhancedContextRetriever:
         query: str,
         context_scope: ContextScope,
         max_results: int
-    ) -> List[SearchResult]:
+    ) -> SearchResultBatch:
         """Retrieve semantic search results within scope."""
         query_embedding = self.embedder.embed(query)
         if not query_embedding:
-            return []
+            return SearchResultBatch.from_rows([], [])
         
-        results = self.vector_store.search(
-            query_embedding,
-            limit=max_results * 2  # Get more, then filter
+        batch = self._search_semantic(query_embedding, max_results)
+        return self._scope_semantic(batch, context_scope, max_results)
+    
+    def _search_semantic(self, query_embedding: List[float], max_results: int) -> SearchResultBatch:
+        """Vector search for one query, over-fetching for later filtering."""
+        # Uses the ANN index when one was built, otherwise a Hamming scan
+        # over binary codes reranked by inner product
+        if self.vector_store.has_ann_index:
+            batch = self.vector_store.search(
+                query_embedding,
+                limit=max_results * 2,  # Get more, then filter
+                as_batch=True,
+            )
+        else:
+            batch = self.vector_store.search_binary(
+                query_embedding,
+                limit=max_results * 2,
+                candidates=max_results * 10,
+                as_batch=True,
+            )
+        return batch
+    
+    def _search_semantic_many(self, query_embeddings: List[List[float]],
+                              max_results: int) -> List[SearchResultBatch]:
+        """_search_semantic for several queries in one store call."""
+        return self.vector_store.search_many(
+            query_embeddings,
+            limit=max_results * 2,
+            binary=not self.vector_store.has_ann_index,
+            candidates=max_results * 10,
+            as_batch=True,
         )
-        
+    
+    @staticmethod
+    def _scope_semantic(batch: SearchResultBatch, context_scope: ContextScope,
+                        max_results: int) -> SearchResultBatch:
+        """Apply the scope's relevance floor and the result limit."""
         # Filter by relevance score from scope
-        results = [
-            r for r in results
-            if r.score >= context_scope.min_relevance_score
-        ]
+        batch = batch.select(batch.scores >= context_scope.min_relevance_score)
         
-        return results[:max_results]
+        return batch.select(slice(0, max_results))
     
-    def _apply_scope_filtering(
+    def _filter_results(
         self,
-        results: List[SearchResult],
+        batch: SearchResultBatch,
         scope: ContextScope
-    ) -> List[SearchResult]:
-        """Filter results based on context scope."""
-        filtered = []
+    ) -> Tuple[List[SearchResult], int]:
+        """
+        Apply scope and security filtering in a single pass.
         
-        for result in results:
-            if scope.should_include(result.file_path):
-                filtered.append(result)
+        Cheap path checks run before the credential scan, and the scan
+        stops as soon as scope.max_files results have been kept. Only the
+        survivors become SearchResult objects.
         
-        return filtered[:scope.max_files]
-    
-    def _apply_security_filtering(
-        self,
-        results: List[SearchResult]
-    ) -> Tuple[List[SearchResult], int]:
-        """Apply security filtering to prevent credential leakage."""
-        filtered = []
+        Returns:
+            (kept_results, security_filtered_count)
+        """
+        kept: List[int] = []
         filtered_count = 0
         
-        for result in results:
+        for i, file_path in enumerate(batch.file_paths):
+            if not scope.should_include(file_path):
+                continue
+            
             # Check file path
-            if self.security_filter.is_sensitive_file(result.file_path):
+            if self.security_filter.is_sensitive_file(file_path):
                 filtered_count += 1
                 continue
             
             # Check content for credentials
-            if self.security_filter.scan_content_for_credentials(result.content):
+            if self.security_filter.scan_content_for_credentials(batch.contents[i]):
                 filtered_count += 1
                 continue
             
-            filtered.append(result)
+            kept.append(i)
+            if len(kept) >= scope.max_files:
+                break
         
-        return filtered, filtered_count
+        return batch.select(kept).to_results(), filtered_count
     
     def _retrieve_call_graph_context(
         self,
@@ -322,28 +475,25 @@ class EnhancedContextRetriever:
         if not semantic_results or not context_scope.enable_call_graph:
             return ""
         
+        symbols = [r.symbol_name for r in semantic_results[:3] if r.symbol_name]
+        if not symbols:
+            return ""
+        
+        # One traversal for all symbols instead of callers + callees per symbol
+        neighborhood = self.call_graph.get_neighborhood(
+            symbols,
+            depth=context_scope.search_depth
+        )
+        
         parts = []
         
-        for result in semantic_results[:3]:
-            if result.symbol_name:
-                # Get callers
-                callers = self.call_graph.get_callers(
-                    result.symbol_name,
-                    depth=context_scope.search_depth
-                )
-                
-                # Get callees
-                callees = self.call_graph.get_callees(
-                    result.symbol_name,
-                    depth=context_scope.search_depth
-                )
-                
-                if callers or callees:
-                    parts.append(f"\n### {result.symbol_name}")
-                    if callers:
-                        parts.append(f"Called by: {', '.join(callers[:5])}")
-                    if callees:
-                        parts.append(f"Calls: {', '.join(callees[:5])}")
+        for symbol, (callers, callees) in neighborhood.items():
+            if callers or callees:
+                parts.append(f"\n### {symbol}")
+                if callers:
+                    parts.append(f"Called by: {', '.join(callers[:5])}")
+                if callees:
+                    parts.append(f"Calls: {', '.join(callees[:5])}")
         
         return "\n".join(parts)
     
@@ -359,7 +509,7 @@ class EnhancedContextRetriever:
         # Get files from results
         files = [r.file_path for r in semantic_results[:5]]
         
-        return self.git.get_recent_context(
+        return self.git.get_recent_context_multi(
             files=files,
             lookback_days=lookback_days,
             limit=5
@@ -417,11 +567,12 @@ class EnhancedContextRetriever:
         """Calculate context quality metrics."""
         
         # Search precision
-        relevant_count = sum(
-            1 for r in retrieved_results if r.score >= 0.7
+        retrieved_scores = np.fromiter(
+            (r.score for r in retrieved_results),
+            dtype=np.float64, count=len(retrieved_results)
         )
         search_precision = (
-            relevant_count / len(retrieved_results)
+            float((retrieved_scores >= 0.7).mean())
             if retrieved_results else 0
         )
         
@@ -430,17 +581,22 @@ class EnhancedContextRetriever:
             len(fitted_items) / max(len(retrieved_results), 1)
         )
         
-        # Token efficiency (relevance per token)
-        total_tokens = sum(
-            TokenCounter.estimate_tokens(
-                item.get('content', ''), 'hybrid'
-            )
-            for item in fitted_items
+        # Token efficiency (relevance per token); counts were computed
+        # while fitting to the budget
+        scores = np.fromiter(
+            (item.get('relevance_score', 0.0) for item in fitted_items),
+            dtype=np.float64, count=len(fitted_items)
         )
-        avg_relevance = (
-            sum(item.get('relevance_score', 0) for item in fitted_items)
-            / max(len(fitted_items), 1)
+        tokens = np.fromiter(
+            (
+                item['token_count'] if 'token_count' in item
+                else TokenCounter.estimate_tokens(item.get('content', ''), 'hybrid')
+                for item in fitted_items
+            ),
+            dtype=np.int64, count=len(fitted_items)
         )
+        total_tokens = int(tokens.sum())
+        avg_relevance = float(scores.mean()) if fitted_items else 0.0
         token_efficiency = (
             avg_relevance / (total_tokens / 1000) if total_tokens > 0 else 0
         )
@@ -475,3 +631,6 @@ When helping with code:
 - Explain your reasoning
 - Suggest tests when appropriate
 """
+
+# Estimated once at import; the prompt is constant
+_SYSTEM_PROMPT_TOKENS = TokenCounter.estimate_tokens(_SYSTEM_PROMPT, "word")
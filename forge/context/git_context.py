@@ -9,11 +9,14 @@ Extracts context from git history:
 Based on: "Mining Version Histories to Guide Software Changes" (Zimmermann et al., 2005)
 """
 
+import copy
+import functools
 import subprocess
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Iterator, Optional, Tuple
 from dataclasses import dataclass
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 
 @dataclass
@@ -35,6 +38,51 @@ class FileHistory:
     top_contributors: List[Tuple[str, int]]
 
 
+def _cached_by_head(method):
+    """
+    Memoize a GitContext query until HEAD points at a different commit.
+    
+    The cache is an LRU of RESULT_CACHE_SIZE entries guarded by a lock.
+    Callers get their own copy of a result (Commit objects and lists are
+    mutable), so one caller can't change what the next one sees. The git
+    call itself runs outside the lock; nested cached calls stay reentrant.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        head = self._current_head()
+        if head is None:
+            return method(self, *args, **kwargs)
+        
+        key = (
+            method.__name__,
+            tuple(tuple(a) if isinstance(a, list) else a for a in args),
+            tuple(sorted(
+                (k, tuple(v) if isinstance(v, list) else v)
+                for k, v in kwargs.items()
+            )),
+        )
+        with self._result_lock:
+            if head != self._head_sha_cache:
+                self._result_cache.clear()
+                self._head_sha_cache = head
+            cached = self._result_cache.get(key)
+            if cached is not None:
+                self._result_cache.move_to_end(key)
+                return copy.deepcopy(cached)
+        
+        result = method(self, *args, **kwargs)
+        
+        with self._result_lock:
+            if head == self._head_sha_cache:
+                self._result_cache[key] = copy.deepcopy(result)
+                self._result_cache.move_to_end(key)
+                while len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+        return result
+    
+    return wrapper
+
+
 class GitContext:
     """
     Extract context from git history.
@@ -49,46 +97,123 @@ class GitContext:
         Software Changes. IEEE TSE.
     """
     
+    GIT_TIMEOUT = 10  # seconds
+    
+    # Distinct query results kept per HEAD commit
+    RESULT_CACHE_SIZE = 256
+    
     def __init__(self, workspace: str):
         self.workspace = Path(workspace)
         self._is_git_repo = (self.workspace / ".git").exists()
+        
+        # Query results are only valid for the commit they were computed at
+        self._head_sha_cache: Optional[str] = None
+        self._result_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._result_lock = threading.Lock()
+    
+    def _git_dir(self) -> Path:
+        """Resolve the git directory (handles worktree `.git` files)."""
+        dot_git = self.workspace / ".git"
+        if dot_git.is_file():
+            content = dot_git.read_text(encoding="utf-8").strip()
+            if content.startswith("gitdir:"):
+                gitdir = Path(content[len("gitdir:"):].strip())
+                return gitdir if gitdir.is_absolute() else self.workspace / gitdir
+        return dot_git
     
-    def _run_git(self, *args) -> Optional[str]:
-        """Run a git command and return output."""
+    def _current_head(self) -> Optional[str]:
+        """
+        Read the commit HEAD points at without spawning git.
+        
+        Follows `ref:` indirection through loose refs, then packed-refs.
+        """
         if not self._is_git_repo:
             return None
         
         try:
-            result = subprocess.run(
-                ["git"] + list(args),
+            git_dir = self._git_dir()
+            head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+            if not head.startswith("ref:"):
+                return head  # Detached HEAD
+            
+            ref = head[len("ref:"):].strip()
+            # Worktrees keep branch refs in the common dir
+            common = git_dir
+            if (git_dir / "commondir").exists():
+                common = git_dir / (git_dir / "commondir").read_text(encoding="utf-8").strip()
+            
+            for base in (git_dir, common):
+                ref_file = base / ref
+                if ref_file.is_file():
+                    return ref_file.read_text(encoding="utf-8").strip()
+            
+            packed = common / "packed-refs"
+            if packed.is_file():
+                for line in packed.read_text(encoding="utf-8").splitlines():
+                    if line.endswith(" " + ref):
+                        return line.split(" ", 1)[0]
+        except OSError:
+            pass
+        return None
+    
+    def _iter_git_lines(self, *args) -> Iterator[str]:
+        """
+        Run a git command and yield stripped output lines as they arrive.
+        
+        Streams stdout instead of buffering it, so large histories never sit
+        in memory all at once. The process is killed after GIT_TIMEOUT or as
+        soon as the consumer stops iterating.
+        """
+        if not self._is_git_repo:
+            return
+        
+        try:
+            proc = subprocess.Popen(
+                ["git", *args],
                 cwd=self.workspace,
-                capture_output=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
-                timeout=10,
+                errors="replace",
             )
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except:
+        except OSError:
+            return
+        
+        # Reads block, so enforce the deadline from a timer thread
+        timer = threading.Timer(self.GIT_TIMEOUT, proc.kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                yield line.strip()
+            proc.wait(timeout=self.GIT_TIMEOUT)
+        except subprocess.TimeoutExpired:
             pass
-        return None
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
     
+    @_cached_by_head
     def get_recent_commits(self, limit: int = 10) -> List[Commit]:
         """Get recent commits."""
-        output = self._run_git(
+        lines = self._iter_git_lines(
             "log", f"-{limit}", 
             "--pretty=format:%H|%an|%ad|%s",
             "--date=short",
             "--name-only"
         )
-        
-        if not output:
-            return []
-        
+        return self._parse_name_only_log(lines)
+    
+    def _parse_name_only_log(self, lines: Iterator[str]) -> List[Commit]:
+        """Parse `git log --pretty=format:%H|%an|%ad|%s --name-only` output."""
         commits = []
         current_commit = None
         current_files = []
         
-        for line in output.split("\n"):
+        for line in lines:
             if "|" in line and len(line.split("|")) >= 4:
                 if current_commit:
                     current_commit.files = current_files
@@ -103,8 +228,8 @@ class GitContext:
                     files=[],
                 )
                 current_files = []
-            elif line.strip() and current_commit:
-                current_files.append(line.strip())
+            elif line and current_commit:
+                current_files.append(line)
         
         if current_commit:
             current_commit.files = current_files
@@ -112,18 +237,16 @@ class GitContext:
         
         return commits
     
+    @_cached_by_head
     def get_file_history(self, file_path: str, limit: int = 5) -> List[Commit]:
         """Get commit history for a specific file."""
-        output = self._run_git(
+        lines = self._iter_git_lines(
             "log", f"-{limit}",
             "--pretty=format:%H|%an|%ad|%s",
             "--date=short",
             "--", file_path
         )
         
-        if not output:
-            return []
-        
         return [
             Commit(
                 hash=parts[0],
@@ -132,12 +255,13 @@ class GitContext:
                 message="|".join(parts[3:]),
                 files=[file_path],
             )
-            for line in output.split("\n")
-            if line.strip()
+            for line in lines
+            if line
             for parts in [line.split("|")]
             if len(parts) >= 4
         ]
     
+    @_cached_by_head
     def get_related_files(self, file_path: str, limit: int = 10) -> List[Tuple[str, int]]:
         """Find files often changed together with this file."""
         commits = self.get_file_history(file_path, limit=50)
@@ -150,17 +274,13 @@ class GitContext:
         
         return sorted(co_changes.items(), key=lambda x: -x[1])[:limit]
     
+    @_cached_by_head
     def get_file_experts(self, file_path: str) -> List[Tuple[str, int]]:
         """Get contributors who have modified this file most."""
-        output = self._run_git("shortlog", "-sn", "--", file_path)
-        
-        if not output:
-            return []
-        
         experts = []
-        for line in output.split("\n"):
-            if line.strip():
-                parts = line.strip().split("\t")
+        for line in self._iter_git_lines("shortlog", "-sn", "HEAD", "--", file_path):
+            if line:
+                parts = line.split("\t")
                 if len(parts) >= 2:
                     experts.append((parts[1], int(parts[0].strip())))
         
@@ -180,4 +300,62 @@ class GitContext:
                 lines.append(f"  Files: {', '.join(c.files[:5])}")
         
         return "\n".join(lines)
+    
+    @_cached_by_head
+    def get_recent_context_multi(
+        self,
+        files: List[str],
+        lookback_days: int = 7,
+        limit: int = 5,
+    ) -> str:
+        """
+        Get formatted recent history for several files with one git call.
+        
+        Runs a single `git log --name-only -- f1 f2 ...` and groups the
+        commits per file in Python instead of spawning git once per file.
+        
+        Args:
+            files: File paths (absolute or workspace-relative)
+            lookback_days: Only include commits this recent
+            limit: Maximum commits listed per file
+        """
+        # Preserve order, drop duplicates; git reports repo-relative paths
+        rel_files = list(dict.fromkeys(self._relative_path(f) for f in files))
+        if not rel_files:
+            return ""
+        
+        lines = self._iter_git_lines(
+            "log", f"-{limit * len(rel_files)}",
+            f"--since={lookback_days} days ago",
+            "--pretty=format:%H|%an|%ad|%s",
+            "--date=short",
+            "--name-only",
+            "--", *rel_files
+        )
+        
+        by_file: Dict[str, List[Commit]] = defaultdict(list)
+        for commit in self._parse_name_only_log(lines):
+            for f in commit.files:
+                if len(by_file[f]) < limit:
+                    by_file[f].append(commit)
+        
+        out = ["Recent git history:"]
+        for f in rel_files:
+            if not by_file.get(f):
+                continue
+            out.append(f"{f}:")
+            for c in by_file[f]:
+                out.append(f"- [{c.date}] {c.message} ({c.author})")
+        
+        return "\n".join(out) if len(out) > 1 else ""
+    
+    def _relative_path(self, file_path: str) -> str:
+        """Convert a path to the repo-relative form git prints."""
+        path = Path(file_path)
+        if not path.is_absolute():
+            return path.as_posix()
+        try:
+            return path.resolve().relative_to(self.workspace.resolve()).as_posix()
+        except ValueError:
+            return path.as_posix()
 
@@ -5,19 +5,57 @@ Implements Retrieval-Augmented Generation (RAG) for code.
 Based on: "Retrieval-Augmented Generation for Knowledge-Intensive NLP Tasks" (Lewis et al., 2020)
 """
 
+import functools
+import multiprocessing
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
 from forge.config import config
 from .embedder import Embedder
-from .chunker import SemanticChunker, CodeChunk
-from .vector_store import VectorStore, SearchResult
+from .embed_cache import EmbeddingCache
+from .chunker import SemanticChunker, CodeChunk, iter_source_files
+from .vector_store import VectorStore, SearchResult, PREVIEW_CHARS
 from .call_graph import CallGraph
 from .git_context import GitContext
 
 
-@dataclass
+# Directories never indexed (pruned during the walk, not per file)
+_SKIP_DIRS = frozenset({
+    "node_modules", ".git", "__pycache__", "venv", ".venv",
+    "dist", "build", ".forge",
+})
+
+# Source file suffixes to index
+_SOURCE_EXTS = (".py", ".js", ".ts", ".tsx", ".go", ".rs", ".java", ".cpp", ".c")
+
+
+# One template per retrieved chunk in _format_context
+_RESULT_TMPL = "**{path}** (lines {start}-{end})\n```\n{body}\n```\n"
+
+# Per-process chunker for parallel indexing, keyed by (chunk_size, overlap)
+_worker_chunkers: Dict[Tuple[int, int], SemanticChunker] = {}
+
+
+def _chunk_file_worker(args: Tuple[str, int, int]) -> List[CodeChunk]:
+    """Chunk one file in a worker process (chunker built from its settings)."""
+    file_path, chunk_size, overlap = args
+    chunker = _worker_chunkers.get((chunk_size, overlap))
+    if chunker is None:
+        chunker = SemanticChunker(chunk_size=chunk_size, overlap=overlap)
+        _worker_chunkers[(chunk_size, overlap)] = chunker
+    return chunker.chunk_file(file_path)
+
+
+@dataclass(slots=True)
 class Context:
     """Assembled context for a query."""
     semantic_results: List[SearchResult]
@@ -42,22 +80,72 @@ class ContextRetriever:
         Knowledge-Intensive NLP Tasks. NeurIPS.
     """
     
+    # Context cache: near-duplicate queries (cosine >= threshold) reuse the
+    # assembled Context for up to CONTEXT_CACHE_TTL seconds
+    CONTEXT_CACHE_SIZE = 128
+    CONTEXT_CACHE_TTL = 300.0
+    SIMILARITY_THRESHOLD = 0.95
+    
+    # Texts per embed_batch call when embedding across threads
+    EMBED_BATCH_SIZE = 64
+    # Below this many files, process start-up outweighs parallel chunking
+    PARALLEL_MIN_FILES = 500
+    
+    # Indexing pipeline: chunks per queued batch, batches buffered ahead of
+    # the embedder, and embedded chunks per vector store write
+    PIPELINE_BATCH_SIZE = 256
+    PIPELINE_QUEUE_SIZE = 4
+    STORE_BATCH_SIZE = 4096
+    
     def __init__(self, workspace: str):
         self.workspace = Path(workspace)
         
-        # Components
-        self.embedder = Embedder()
-        self.chunker = SemanticChunker(
+        self._indexed = False
+        
+        # (query, max_results, include_call_graph, include_git) ->
+        #     (unit query embedding, Context, created_at)
+        self._context_cache: "OrderedDict[Tuple, Tuple[np.ndarray, Context, float]]" = OrderedDict()
+        # The MCP server retrieves from worker threads
+        self._context_cache_lock = threading.Lock()
+    
+    # Components are built on first use, so e.g. retrieving from an
+    # existing index never builds the call graph or git helpers
+    
+    @functools.cached_property
+    def embedder(self) -> Embedder:
+        return Embedder()
+    
+    @functools.cached_property
+    def chunker(self) -> SemanticChunker:
+        return SemanticChunker(
             chunk_size=config.chunk_size,
             overlap=config.chunk_overlap,
         )
-        self.vector_store = VectorStore(
-            str(self.workspace / ".forge" / "vectors")
+    
+    @functools.cached_property
+    def vector_store(self) -> VectorStore:
+        return VectorStore(
+            str(self.workspace / ".forge" / "vectors"),
+            ann_profile=config.ann_profile,
+            quantize=config.quantize_vectors,
         )
-        self.call_graph = CallGraph(workspace)
-        self.git = GitContext(workspace)
-        
-        self._indexed = False
+    
+    @functools.cached_property
+    def call_graph(self) -> CallGraph:
+        return CallGraph(str(self.workspace))
+    
+    @functools.cached_property
+    def git(self) -> GitContext:
+        return GitContext(str(self.workspace))
+    
+    @functools.cached_property
+    def embed_cache(self) -> EmbeddingCache:
+        return EmbeddingCache(str(self.workspace / ".forge" / "embed_cache.sqlite"))
+    
+    @functools.cached_property
+    def _embed_cached(self):
+        """Exact-match query embedding cache (per instance)."""
+        return functools.lru_cache(maxsize=512)(self.embedder.embed)
     
     def index(self, force: bool = False):
         """Index the codebase for semantic search."""
@@ -66,40 +154,20 @@ class ContextRetriever:
         
         if force:
             self.vector_store.clear()
+        with self._context_cache_lock:
+            self._context_cache.clear()
         
-        # Find all source files
-        extensions = [".py", ".js", ".ts", ".tsx", ".go", ".rs", ".java", ".cpp", ".c"]
-        all_chunks: List[CodeChunk] = []
-        
-        for ext in extensions:
-            for file_path in self.workspace.rglob(f"*{ext}"):
-                if self._should_skip(file_path):
-                    continue
-                
-                chunks = self.chunker.chunk_file(str(file_path))
-                all_chunks.extend(chunks)
+        # Chunk, embed (cache misses only) and store all source files
+        file_paths = list(iter_source_files(str(self.workspace), _SOURCE_EXTS, _SKIP_DIRS))
+        counts = self._index_pipelined(file_paths)
+        if counts is None:
+            return
         
-        if not all_chunks:
+        chunked, added = counts
+        if chunked == 0:
             print("⚠️  No code chunks found to index")
             return
 
-        # Check embedder connectivity before proceeding
-        if not self.embedder.check_connection():
-            provider = self.embedder.provider
-            if provider == "ollama":
-                print("⚠️  Cannot connect to Ollama for embeddings - index will be empty")
-                print(f"   Make sure Ollama is running at {self.embedder.base_url}")
-                print(f"   Run: ollama serve && ollama pull {self.embedder.model}")
-            else:
-                print(f"⚠️  Embedding provider '{provider}' is not available - index will be empty")
-                print(f"   Run: pip install {provider}")
-            return
-
-        # Generate embeddings and store
-        texts = [c.content for c in all_chunks]
-        embeddings = self.embedder.embed_batch(texts)
-
-        added = self.vector_store.add_chunks(all_chunks, embeddings)
         print(f"Indexed {added} code chunks")
 
         if added == 0:
@@ -113,11 +181,160 @@ class ContextRetriever:
 
         self._indexed = True
     
-    def _should_skip(self, path: Path) -> bool:
-        """Skip certain directories."""
-        skip_dirs = {"node_modules", ".git", "__pycache__", "venv", ".venv", 
-                     "dist", "build", ".forge"}
-        return any(part in skip_dirs for part in path.parts)
+    def _index_pipelined(self, file_paths: List[str]) -> Optional[Tuple[int, int]]:
+        """
+        Chunk files on a background thread while this thread embeds and stores.
+        
+        The producer pushes batches of chunks through a bounded queue, so
+        file parsing overlaps embedding and memory stays flat. Returns
+        (chunks produced, chunks stored), or None if the embedding provider
+        is unreachable.
+        """
+        batches: "queue.Queue[Optional[List[CodeChunk]]]" = queue.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def produce():
+            try:
+                batch: List[CodeChunk] = []
+                for chunk in self._iter_chunks(file_paths):
+                    batch.append(chunk)
+                    if len(batch) >= self.PIPELINE_BATCH_SIZE:
+                        if not put(batch):
+                            return
+                        batch = []
+                if batch:
+                    put(batch)
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put(None)
+        
+        producer = threading.Thread(target=produce, name="forge-index-chunker", daemon=True)
+        producer.start()
+        
+        chunked = added = 0
+        pending_chunks: List[CodeChunk] = []
+        pending_vectors: List[List[float]] = []
+        connected = False
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                chunked += len(batch)
+                
+                embeddings = self._embed_chunks(batch, check_connection=not connected)
+                if embeddings is None:
+                    return None
+                connected = connected or any(embeddings)
+                
+                pending_chunks.extend(batch)
+                pending_vectors.extend(embeddings)
+                if len(pending_chunks) >= self.STORE_BATCH_SIZE:
+                    added += self.vector_store.add_chunks(pending_chunks, pending_vectors)
+                    pending_chunks, pending_vectors = [], []
+            
+            if pending_chunks:
+                added += self.vector_store.add_chunks(pending_chunks, pending_vectors)
+        finally:
+            stop.set()
+            producer.join()
+        
+        if errors:
+            raise errors[0]
+        return chunked, added
+    
+    def _embed_chunks(self, chunks: List[CodeChunk],
+                      check_connection: bool = True) -> Optional[List[List[float]]]:
+        """
+        Embed chunks, reusing cached vectors for unchanged content.
+        
+        Only chunks whose (model, content hash) is not in the on-disk cache
+        are sent to the embedder, in a single batch. Returns None if there
+        are misses and the embedding provider is unreachable.
+        """
+        model = self.embedder.model
+        hashes = [EmbeddingCache.content_hash(c.content) for c in chunks]
+        vectors = self.embed_cache.get_many(model, set(hashes))
+        
+        # Identical chunks share a hash, so each miss is embedded once
+        misses = {}
+        for h, chunk in zip(hashes, chunks):
+            if h not in vectors:
+                misses.setdefault(h, chunk.content)
+        
+        if misses:
+            # Check embedder connectivity before proceeding
+            if check_connection and not self.embedder.check_connection():
+                provider = self.embedder.provider
+                if provider == "ollama":
+                    print("⚠️  Cannot connect to Ollama for embeddings - index will be empty")
+                    print(f"   Make sure Ollama is running at {self.embedder.base_url}")
+                    print(f"   Run: ollama serve && ollama pull {self.embedder.model}")
+                else:
+                    print(f"⚠️  Embedding provider '{provider}' is not available - index will be empty")
+                    print(f"   Run: pip install {provider}")
+                return None
+            
+            fresh = dict(zip(misses, self._embed_texts(list(misses.values()))))
+            self.embed_cache.put_many(model, fresh)
+            vectors.update(fresh)
+        
+        return [vectors.get(h, []) for h in hashes]
+    
+    def _iter_chunks(self, file_paths: List[str]) -> Iterator[CodeChunk]:
+        """Chunk files in order, across worker processes when config.index_workers > 1."""
+        workers = min(config.index_workers, len(file_paths))
+        done = 0
+        
+        if workers > 1 and len(file_paths) >= self.PARALLEL_MIN_FILES:
+            args = [
+                (path, self.chunker.chunk_size, self.chunker.overlap)
+                for path in file_paths
+            ]
+            try:
+                # spawn: forking would copy LanceDB's runtime threads
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                    chunksize = max(1, len(args) // (workers * 4))
+                    for chunks in pool.map(_chunk_file_worker, args, chunksize=chunksize):
+                        done += 1
+                        yield from chunks
+                    return
+            except (OSError, BrokenProcessPool) as e:
+                print(f"⚠️  Parallel chunking unavailable ({e}) - chunking serially")
+        
+        # Serial path, or the files the pool did not get to
+        for path in file_paths[done:]:
+            yield from self.chunker.chunk_file(path)
+    
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, sharding network-bound providers across threads.
+        
+        sentence-transformers already batches natively in-process, so it
+        gets a single call; Ollama embeds per request, so sub-batches are
+        dispatched concurrently when config.index_workers > 1.
+        """
+        workers = config.index_workers
+        if (workers <= 1 or self.embedder.provider == "sentence-transformers"
+                or len(texts) <= self.EMBED_BATCH_SIZE):
+            return self.embedder.embed_batch(texts)
+        
+        size = self.EMBED_BATCH_SIZE
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            return [vec for batch in pool.map(self.embedder.embed_batch, batches) for vec in batch]
     
     def retrieve(
         self,
@@ -125,6 +342,7 @@ class ContextRetriever:
         max_results: int = 5,
         include_call_graph: bool = True,
         include_git: bool = True,
+        no_cache: bool = False,
     ) -> Context:
         """
         Retrieve relevant context for a query.
@@ -134,13 +352,23 @@ class ContextRetriever:
             max_results: Maximum semantic search results
             include_call_graph: Include call graph context
             include_git: Include git history
+            no_cache: Bypass the embedding and context caches
             
         Returns:
             Context object with all assembled context
         """
         # 1. Semantic search
-        query_embedding = self.embedder.embed(query)
-        semantic_results = self.vector_store.search(query_embedding, limit=max_results)
+        query_embedding = self._embed_query(query, no_cache)
+        
+        options = (max_results, include_call_graph, include_git)
+        if not no_cache and query_embedding:
+            cached = self._lookup_context(query_embedding, options)
+            if cached is not None:
+                return cached
+        
+        semantic_results = self.vector_store.search_np(
+            np.asarray(query_embedding, dtype=np.float32), limit=max_results
+        )
         
         # 2. Call graph context (for symbols found in results)
         cg_context = ""
@@ -161,12 +389,73 @@ class ContextRetriever:
         # 4. Format into single context string
         formatted = self._format_context(semantic_results, cg_context, git_ctx)
         
-        return Context(
+        context = Context(
             semantic_results=semantic_results,
             call_graph_context=cg_context,
             git_context=git_ctx,
             formatted=formatted,
         )
+        
+        if not no_cache and query_embedding:
+            self._store_context(query, query_embedding, options, context)
+        
+        return context
+    
+    def _embed_query(self, query: str, no_cache: bool = False) -> List[float]:
+        """Embed a query, reusing the embedding for repeated query strings."""
+        if no_cache:
+            return self.embedder.embed(query)
+        
+        vector = self._embed_cached(query)
+        if not vector:
+            # Don't pin a failed embedding (e.g. provider down) in the cache
+            self._embed_cached.cache_clear()
+        return vector
+    
+    def _lookup_context(self, query_embedding: List[float], options: Tuple) -> Optional[Context]:
+        """Find a fresh cached Context for a near-identical query."""
+        query_unit = self._unit(query_embedding)
+        
+        with self._context_cache_lock:
+            now = time.monotonic()
+            expired = [
+                key for key, (_, _, created) in self._context_cache.items()
+                if now - created > self.CONTEXT_CACHE_TTL
+            ]
+            for key in expired:
+                del self._context_cache[key]
+            
+            keys = [k for k in self._context_cache if k[1:] == options]
+            if not keys:
+                return None
+            
+            # One matmul against all candidate embeddings
+            matrix = np.stack([self._context_cache[k][0] for k in keys])
+            similarities = matrix @ query_unit
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.SIMILARITY_THRESHOLD:
+                return None
+            
+            self._context_cache.move_to_end(keys[best])
+            return self._context_cache[keys[best]][1]
+    
+    def _store_context(self, query: str, query_embedding: List[float],
+                       options: Tuple, context: Context):
+        """Cache an assembled Context, evicting the least recently used."""
+        key = (query, *options)
+        entry = (self._unit(query_embedding), context, time.monotonic())
+        with self._context_cache_lock:
+            self._context_cache[key] = entry
+            self._context_cache.move_to_end(key)
+            while len(self._context_cache) > self.CONTEXT_CACHE_SIZE:
+                self._context_cache.popitem(last=False)
+    
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        """L2-normalize a vector so dot products are cosine similarities."""
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(arr))
+        return arr / norm if norm > 0 else arr
     
     def _format_context(
         self, 
@@ -180,9 +469,13 @@ class ContextRetriever:
         # Semantic search results
         if results:
             parts.append("### Relevant Code\n")
-            for r in results:
-                parts.append(f"**{r.file_path}** (lines {r.start_line}-{r.end_line})")
-                parts.append(f"```\n{r.content[:500]}\n```\n")
+            parts.extend(
+                _RESULT_TMPL.format(
+                    path=r.file_path, start=r.start_line, end=r.end_line,
+                    body=r.preview if r.preview is not None else r.content[:PREVIEW_CHARS],
+                )
+                for r in results
+            )
         
         # Call graph
         if cg_context:
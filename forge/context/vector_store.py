@@ -5,13 +5,20 @@ LanceDB provides embedded vector database with disk persistence.
 Based on: "Approximate Nearest Neighbors" (Arya et al., 1998)
 """
 
+import math
+import os
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 
+import numpy as np
+
 try:
     import lancedb
-    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
     HAS_LANCEDB = True
 except ImportError:
     HAS_LANCEDB = False
@@ -19,7 +26,11 @@ except ImportError:
 from .chunker import CodeChunk
 
 
-@dataclass  
+# Characters of chunk content shown in formatted context
+PREVIEW_CHARS = 500
+
+
+@dataclass(slots=True)
 class SearchResult:
     """Result from vector search."""
     content: str
@@ -28,6 +39,100 @@ class SearchResult:
     end_line: int
     score: float
     symbol_name: Optional[str] = None
+    # content[:PREVIEW_CHARS], precomputed when the corpus is loaded
+    preview: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SearchResultBatch:
+    """
+    Search results stored column-wise (struct of arrays).
+    
+    Lets filters run as boolean masks over whole columns; SearchResult
+    objects are only built for rows that survive, via to_results().
+    """
+    contents: List[str]
+    file_paths: "np.ndarray"   # dtype=object
+    start_lines: "np.ndarray"  # int64
+    end_lines: "np.ndarray"    # int64
+    scores: "np.ndarray"       # float32
+    symbol_names: List[Optional[str]]
+    previews: Optional[List[str]] = None
+    
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], scores: List[float]) -> "SearchResultBatch":
+        """Build a batch from LanceDB rows and their similarity scores."""
+        return cls(
+            contents=[r["content"] for r in rows],
+            file_paths=np.array([r["file_path"] for r in rows], dtype=object),
+            start_lines=np.fromiter((r["start_line"] for r in rows), dtype=np.int64, count=len(rows)),
+            end_lines=np.fromiter((r["end_line"] for r in rows), dtype=np.int64, count=len(rows)),
+            scores=np.asarray(scores, dtype=np.float32),
+            symbol_names=[r.get("symbol_name") for r in rows],
+        )
+    
+    def __len__(self) -> int:
+        return len(self.contents)
+    
+    def select(self, keep: Union["np.ndarray", slice, Sequence[int]]) -> "SearchResultBatch":
+        """Return the rows picked by a boolean mask, index array or slice."""
+        if isinstance(keep, slice):
+            idx = range(len(self))[keep]
+        else:
+            keep = np.asarray(keep)
+            if keep.dtype != bool:
+                keep = keep.astype(np.intp, copy=False)  # [] would be float64
+            idx = np.flatnonzero(keep) if keep.dtype == bool else keep
+        return SearchResultBatch(
+            contents=[self.contents[i] for i in idx],
+            file_paths=self.file_paths[keep],
+            start_lines=self.start_lines[keep],
+            end_lines=self.end_lines[keep],
+            scores=self.scores[keep],
+            symbol_names=[self.symbol_names[i] for i in idx],
+            previews=[self.previews[i] for i in idx] if self.previews is not None else None,
+        )
+    
+    def to_results(self) -> List[SearchResult]:
+        """Materialize SearchResult objects for every row."""
+        previews = self.previews if self.previews is not None else [None] * len(self)
+        return [
+            SearchResult(
+                content=content,
+                file_path=file_path,
+                start_line=int(start),
+                end_line=int(end),
+                score=float(score),
+                symbol_name=symbol,
+                preview=preview,
+            )
+            for content, file_path, start, end, score, symbol, preview in zip(
+                self.contents, self.file_paths, self.start_lines,
+                self.end_lines, self.scores, self.symbol_names, previews,
+            )
+        ]
+
+
+def l2_normalize(embeddings) -> "np.ndarray":
+    """Scale each row (or a single vector) to unit L2 norm; zero rows stay zero."""
+    vectors = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-12)
+    return vectors
+
+
+def binary_quantize(embeddings) -> "np.ndarray":
+    """Pack the sign bit of each dimension: (..., d) floats -> (..., d/8) uint8."""
+    return np.packbits(np.asarray(embeddings, dtype=np.float32) > 0, axis=-1)
+
+
+def int8_quantize(embeddings) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Symmetric per-row int8 codes: (n, d) floats -> (n, d) int8 and (n,) scales."""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=-1) / 127.0 if vectors.size else np.zeros(len(vectors), np.float32)
+    safe = np.where(scales > 0, scales, 1.0)[..., None]
+    codes = np.clip(np.round(vectors / safe), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
 
 
 class VectorStore:
@@ -46,100 +151,622 @@ class VectorStore:
     
     TABLE_NAME = "code_chunks"
     
-    def __init__(self, db_path: str):
+    # Below this many rows a brute-force scan is fast enough and IVF
+    # training would not have enough samples per partition.
+    ANN_MIN_ROWS = 10_000
+    ANN_NPROBES = 20
+    
+    # Recall/latency presets: IVF partitions probed per query
+    ANN_PROFILES = {"fast": 5, "balanced": ANN_NPROBES, "recall": 50}
+    
+    # Hamming candidates fetched per requested result before float rerank
+    BINARY_RERANK_FACTOR = 10
+    
+    # Schema metadata marking tables whose vectors are stored L2-normalized,
+    # which makes LanceDB's dot distance equal to cosine distance
+    _NORMALIZED_KEY = b"forge.normalized"
+    
+    # Friendly metric names -> LanceDB distance types
+    _METRICS = {"ip": "dot", "dot": "dot", "cosine": "cosine", "l2": "l2"}
+    
+    # Rows per matmul block in search_np (bounds the fp32 upcast buffer)
+    MATRIX_BLOCK_ROWS = 65_536
+    
+    # search_np corpus persisted next to the LanceDB table
+    MATRIX_FILE = "matrix.npy"
+    SCALES_FILE = "scales.npy"
+    CORPUS_FILE = "corpus.parquet"
+    _CORPUS_COLUMNS = ("content", "file_path", "start_line", "end_line", "symbol_name")
+    
+    # One LanceDB connection per database directory, shared by every
+    # VectorStore in the process
+    _connections: Dict[str, Any] = {}
+    _connections_lock = threading.Lock()
+    
+    def __init__(self, db_path: str,
+                 ann_profile: Literal["fast", "balanced", "recall"] = "balanced",
+                 quantize: bool = False):
         self.db_path = Path(db_path)
         self.db_path.mkdir(parents=True, exist_ok=True)
         
         self._db = None
-        self._table = None
+        self._table = None  # Cached handle, opened or created on first use
+        self._table_lock = threading.RLock()
+        self._ann_metric: Optional[str] = None  # Set once an ANN index is built
+        self.ann_profile = ann_profile
+        
+        # In-memory corpus for search_np: L2-normalized fp16 vectors (or
+        # int8 codes plus per-row scales when quantize=True) and the
+        # matching row metadata, loaded on first use
+        self.quantize = quantize
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._corpus: Optional[SearchResultBatch] = None
     
     @property
     def db(self):
-        """Lazy database connection."""
+        """Lazy database connection, shared across stores on the same path."""
         if self._db is None and HAS_LANCEDB:
-            self._db = lancedb.connect(str(self.db_path))
+            key = str(self.db_path.resolve())
+            with VectorStore._connections_lock:
+                conn = VectorStore._connections.get(key)
+                if conn is None:
+                    conn = VectorStore._connections[key] = lancedb.connect(key)
+            self._db = conn
         return self._db
     
-    def add_chunks(self, chunks: List[CodeChunk], embeddings: List[List[float]]) -> int:
-        """Add code chunks with their embeddings to the store."""
+    def _get_table(self):
+        """Cached table handle, or None if the table does not exist yet."""
+        if self._table is None and HAS_LANCEDB:
+            with self._table_lock:
+                if self._table is None and self.TABLE_NAME in self.db.table_names():
+                    self._table = self.db.open_table(self.TABLE_NAME)
+        return self._table
+    
+    @property
+    def has_ann_index(self) -> bool:
+        """Whether searches go through an IVF index."""
+        return self._ann_metric is not None
+    
+    @property
+    def nprobes(self) -> int:
+        """IVF partitions probed per query for the current ann_profile."""
+        return self.ANN_PROFILES.get(self.ann_profile, self.ANN_NPROBES)
+    
+    def add_chunks(self, chunks: List[CodeChunk],
+                   embeddings: Union[List[List[float]], "np.ndarray"],
+                   binary: bool = False, build_index: bool = True) -> int:
+        """
+        Add code chunks with their embeddings to the store.
+        
+        Embeddings may be a list of vectors (empty ones are skipped) or an
+        (N, dim) array. Rows are inserted as one Arrow record batch with
+        the vectors in a single contiguous float32 buffer, L2-normalized so
+        searches can use plain dot products.
+        
+        With binary=True the sign-quantized codes are stored in a `bits`
+        column alongside the float vectors for use by search_binary().
+        
+        With build_index=False the insert skips ensure_index(), for bulk
+        indexers that train the ANN index themselves via build_ann().
+        """
         if not HAS_LANCEDB:
             print("⚠️  lancedb not installed - cannot store code chunks. Run: pip install lancedb")
             return 0
-        if not chunks or not embeddings:
+        if not chunks or len(embeddings) == 0:
             return 0
         
-        data = []
-        for chunk, embedding in zip(chunks, embeddings):
-            if embedding:  # Skip empty embeddings
-                data.append({
-                    "vector": embedding,
-                    "content": chunk.content,
-                    "file_path": chunk.file_path,
-                    "start_line": chunk.start_line,
-                    "end_line": chunk.end_line,
-                    "chunk_type": chunk.chunk_type,
-                    "symbol_name": chunk.symbol_name or "",
-                })
-        
-        if not data:
-            return 0
+        if isinstance(embeddings, np.ndarray):
+            kept = list(range(min(len(chunks), len(embeddings))))
+            matrix = np.ascontiguousarray(embeddings[:len(kept)], dtype=np.float32)
+            if not kept:
+                return 0
+        else:
+            kept = [i for i, e in zip(range(len(chunks)), embeddings) if len(e)]  # Skip empty embeddings
+            if not kept:
+                return 0
+            # Stack once: one contiguous float32 buffer for the vector column
+            matrix = np.asarray([embeddings[i] for i in kept], dtype=np.float32)
         
         try:
-            if self.TABLE_NAME in self.db.table_names():
-                table = self.db.open_table(self.TABLE_NAME)
-                table.add(data)
-            else:
-                self._table = self.db.create_table(self.TABLE_NAME, data)
+            batch = self._record_batch([chunks[i] for i in kept], l2_normalize(matrix), binary)
             
-            return len(data)
+            with self._table_lock:
+                table = self._get_table()
+                if table is not None:
+                    data = pa.Table.from_batches([batch])
+                    if "bits" in data.schema.names and "bits" not in table.schema.names:
+                        # Table predates binary codes - keep its schema
+                        data = data.drop(["bits"])
+                    elif "bits" in table.schema.names and "bits" not in data.schema.names:
+                        # Table was written with binary codes; these rows have none
+                        bits_field = table.schema.field("bits")
+                        data = data.append_column(bits_field, pa.nulls(len(data), bits_field.type))
+                    table.add(data.cast(table.schema))
+                else:
+                    # Explicit schema: no inference, `bits` is a fixed-size uint8 vector
+                    self._table = self.db.create_table(
+                        self.TABLE_NAME, pa.Table.from_batches([batch]), schema=batch.schema,
+                    )
+            
+            self._invalidate_matrix()
         except Exception as e:
             print(f"Vector store error: {e}")
             return 0
+        
+        if build_index:
+            self.ensure_index(matrix.shape[1])
+        return len(kept)
+    
+    @classmethod
+    def _record_batch(cls, chunks: List[CodeChunk], matrix: "np.ndarray",
+                      binary: bool) -> "pa.RecordBatch":
+        """Build one Arrow record batch for chunks and their (N, dim) vectors."""
+        n, dim = matrix.shape
+        arrays = [
+            pa.FixedSizeListArray.from_arrays(pa.array(matrix.reshape(-1)), dim),
+            pa.array([c.content for c in chunks], type=pa.string()),
+            pa.array([c.file_path for c in chunks], type=pa.string()),
+            pa.array([c.start_line for c in chunks], type=pa.int64()),
+            pa.array([c.end_line for c in chunks], type=pa.int64()),
+            pa.array([c.chunk_type for c in chunks], type=pa.string()),
+            pa.array([c.symbol_name or "" for c in chunks], type=pa.string()),
+        ]
+        if binary:
+            codes = binary_quantize(matrix)
+            arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(codes.reshape(-1)), codes.shape[1]))
+        return pa.RecordBatch.from_arrays(arrays, schema=cls._schema(dim, binary))
+    
+    def _distance_metric(self, table) -> str:
+        """
+        Metric for searches on table: the ANN index's when one is active,
+        else dot for normalized tables and cosine for ones written before
+        vectors were normalized on ingest.
+        """
+        if self._ann_metric:
+            return self._ann_metric
+        metadata = table.schema.metadata or {}
+        return "dot" if metadata.get(self._NORMALIZED_KEY) == b"1" else "cosine"
+    
+    def search(self, query_embedding: List[float], limit: int = 10,
+               as_batch: bool = False) -> Union[List[SearchResult], "SearchResultBatch"]:
+        """
+        Search for similar code chunks.
+        
+        With as_batch=True, returns a SearchResultBatch (struct of arrays)
+        so callers can filter with masks before building SearchResults.
+        """
+        rows, scores = self._search_rows(query_embedding, limit)
+        return self._package(rows, scores, as_batch)
+    
+    def search_binary(self, query_embedding: List[float], limit: int = 10,
+                      candidates: Optional[int] = None,
+                      as_batch: bool = False) -> Union[List[SearchResult], "SearchResultBatch"]:
+        """
+        Two-stage search over binary codes.
+        
+        Fetches candidates by Hamming distance on the packed sign bits, then
+        reranks them by fp16 inner product against the stored vectors.
+        Falls back to search() when the table has no binary codes.
+        """
+        rows, scores = self._search_binary_rows(query_embedding, limit, candidates)
+        return self._package(rows, scores, as_batch)
+    
+    def search_many(self, query_embeddings: Sequence[List[float]], limit: int = 10,
+                    binary: bool = False, candidates: Optional[int] = None,
+                    as_batch: bool = False) -> List[Union[List[SearchResult], "SearchResultBatch"]]:
+        """
+        Search for several queries with a single multi-vector LanceDB query.
+        
+        The queries share one scan (or one pass over the probed IVF
+        partitions) instead of paying for it once each. Results line up
+        with query_embeddings; empty embeddings get empty results. With
+        binary=True candidates come from the Hamming codes and are
+        reranked as in search_binary().
+        """
+        grouped = self._search_rows_many(query_embeddings, limit, binary, candidates)
+        return [self._package(rows, scores, as_batch) for rows, scores in grouped]
+    
+    def search_np(self, query_vec: np.ndarray, limit: int = 10,
+                  as_batch: bool = False) -> Union[List[SearchResult], "SearchResultBatch"]:
+        """
+        Exact cosine search against an in-memory normalized matrix.
+        
+        The corpus is loaded once as L2-normalized fp16 vectors, so each
+        query is a blocked matrix-vector product plus an argpartition
+        top-k. Scores are cosine similarities. With quantize=True the
+        matrix holds int8 codes, half the bytes of fp16, and each block's
+        products are rescaled per row.
+        """
+        query = np.asarray(query_vec, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(query)) if query.size else 0.0
+        if norm == 0.0:
+            print("⚠️  Empty query embedding - cannot search (check embedding provider)")
+            return self._package([], [], as_batch)
+        
+        if not self._load_matrix() or len(self._corpus) == 0:
+            return self._package([], [], as_batch)
+        if self._matrix.shape[1] != query.size:
+            print(f"Search error: query dimension {query.size} != index dimension {self._matrix.shape[1]}")
+            return self._package([], [], as_batch)
+        
+        query /= norm
+        n = self._matrix.shape[0]
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.MATRIX_BLOCK_ROWS):
+            block = self._matrix[start:start + self.MATRIX_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        if self._scales is not None:
+            scores *= self._scales
+        
+        k = min(limit, n)
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top])]
+        
+        batch = self._corpus.select(top)
+        batch.scores = scores[top]
+        return batch if as_batch else batch.to_results()
     
-    def search(self, query_embedding: List[float], limit: int = 10) -> List[SearchResult]:
-        """Search for similar code chunks."""
+    def _load_matrix(self) -> bool:
+        """
+        Load the stored vectors and metadata for search_np.
+        
+        The normalized fp16 matrix is persisted as matrix.npy and memory-
+        mapped, so only the pages a matmul touches are read. Metadata lives
+        in corpus.parquet. Both are tagged with the table version they were
+        built from and rebuilt from LanceDB when stale. Quantized stores
+        keep int8 codes in matrix.npy and their scales in scales.npy.
+        """
+        if self._matrix is not None:
+            return True
+        table = self._get_table()
+        if table is None:
+            return False
+        
+        matrix_path = self.db_path / self.MATRIX_FILE
+        scales_path = self.db_path / self.SCALES_FILE
+        corpus_path = self.db_path / self.CORPUS_FILE
+        
+        try:
+            # The encoding is part of the tag, so toggling quantize rebuilds
+            tag = f"{table.version}:{len(table)}:{'int8' if self.quantize else 'fp16'}".encode()
+            
+            if matrix_path.exists() and corpus_path.exists() and (
+                    scales_path.exists() or not self.quantize):
+                corpus = pq.read_table(corpus_path)
+                if (corpus.schema.metadata or {}).get(b"table_tag") == tag:
+                    self._corpus = self._corpus_from_arrow(corpus)
+                    self._matrix = np.load(matrix_path, mmap_mode="r")
+                    self._scales = np.load(scales_path) if self.quantize else None
+                    return True
+            
+            arrow = table.to_arrow()
+            n = arrow.num_rows
+            
+            flat = arrow.column("vector").combine_chunks().flatten().to_numpy(zero_copy_only=False)
+            vectors = flat.astype(np.float32, copy=False).reshape(n, -1) if n else np.zeros((0, 0), np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+            
+            corpus = arrow.select(list(self._CORPUS_COLUMNS)).replace_schema_metadata({"table_tag": tag})
+            self._corpus = self._corpus_from_arrow(corpus)
+            if self.quantize:
+                self._matrix, self._scales = int8_quantize(vectors)
+            else:
+                self._matrix, self._scales = vectors.astype(np.float16), None
+            
+            self._persist_matrix(self._matrix, corpus, self._scales)
+            return True
+        except Exception as e:
+            print(f"Search error: {e}")
+            return False
+    
+    def _persist_matrix(self, matrix: np.ndarray, corpus: "pa.Table",
+                        scales: Optional[np.ndarray] = None):
+        """Write matrix.npy (+ scales.npy) and corpus.parquet atomically (best effort)."""
+        matrix_path = self.db_path / self.MATRIX_FILE
+        scales_path = self.db_path / self.SCALES_FILE
+        corpus_path = self.db_path / self.CORPUS_FILE
+        try:
+            tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+            tmp_scales = scales_path.with_name(scales_path.name + ".tmp")
+            tmp_corpus = corpus_path.with_name(corpus_path.name + ".tmp")
+            with open(tmp_matrix, "wb") as f:
+                np.save(f, matrix)
+            if scales is not None:
+                with open(tmp_scales, "wb") as f:
+                    np.save(f, scales)
+            pq.write_table(corpus, tmp_corpus)
+            # Matrix first: a corpus tag never vouches for an older matrix
+            os.replace(tmp_matrix, matrix_path)
+            if scales is not None:
+                os.replace(tmp_scales, scales_path)
+            os.replace(tmp_corpus, corpus_path)
+        except OSError as e:
+            print(f"Warning: could not persist search matrix: {e}")
+    
+    @staticmethod
+    def _corpus_from_arrow(corpus: "pa.Table") -> SearchResultBatch:
+        """Build the metadata batch for search_np from its Arrow columns."""
+        n = corpus.num_rows
+        content = corpus.column("content")
+        return SearchResultBatch(
+            contents=content.to_pylist(),
+            file_paths=np.array(corpus.column("file_path").to_pylist(), dtype=object),
+            start_lines=corpus.column("start_line").to_numpy().astype(np.int64, copy=False),
+            end_lines=corpus.column("end_line").to_numpy().astype(np.int64, copy=False),
+            scores=np.zeros(n, dtype=np.float32),
+            symbol_names=corpus.column("symbol_name").to_pylist(),
+            # Sliced once per load in Arrow, not per retrieve
+            previews=pc.utf8_slice_codeunits(content, 0, PREVIEW_CHARS).to_pylist(),
+        )
+    
+    def _invalidate_matrix(self):
+        """Drop the in-memory corpus after the table changes."""
+        self._matrix = None
+        self._scales = None
+        self._corpus = None
+    
+    def _search_rows(self, query_embedding: List[float],
+                     limit: int) -> Tuple[List[Dict[str, Any]], List[float]]:
+        """Run a vector search, returning raw rows and similarity scores."""
         if not HAS_LANCEDB:
             print("⚠️  lancedb not installed - cannot search. Run: pip install lancedb")
-            return []
+            return [], []
         if not query_embedding:
             print("⚠️  Empty query embedding - cannot search (check embedding provider)")
-            return []
+            return [], []
+        
+        try:
+            table = self._get_table()
+            if table is None:
+                return [], []
+            
+            query = table.search(l2_normalize(query_embedding)).metric(self._distance_metric(table))
+            if self._ann_metric:
+                # Query the IVF index with the metric it was trained on
+                query = query.nprobes(self.nprobes)
+            rows = query.limit(limit).to_list()
+            
+            # Dot and cosine distances are 1 - similarity
+            return rows, [1 - r.get("_distance", 0) for r in rows]
+        except Exception as e:
+            print(f"Search error: {e}")
+            return [], []
+    
+    def _search_binary_rows(self, query_embedding: List[float], limit: int,
+                            candidates: Optional[int]) -> Tuple[List[Dict[str, Any]], List[float]]:
+        """Hamming candidate search + float rerank, returning rows and scores."""
+        if not HAS_LANCEDB or not query_embedding:
+            return self._search_rows(query_embedding, limit)
         
         try:
-            if self.TABLE_NAME not in self.db.table_names():
-                return []
-            
-            table = self.db.open_table(self.TABLE_NAME)
-            results = table.search(query_embedding).limit(limit).to_list()
-            
-            return [
-                SearchResult(
-                    content=r["content"],
-                    file_path=r["file_path"],
-                    start_line=r["start_line"],
-                    end_line=r["end_line"],
-                    score=1 - r.get("_distance", 0),  # Convert distance to similarity
-                    symbol_name=r.get("symbol_name"),
+            table = self._get_table()
+            if table is None:
+                return [], []
+            
+            if "bits" not in table.schema.names:
+                return self._search_rows(query_embedding, limit)
+            
+            query = l2_normalize(query_embedding)
+            rows = (
+                table.search(binary_quantize(query), vector_column_name="bits")
+                .metric("hamming")
+                .limit(candidates or limit * self.BINARY_RERANK_FACTOR)
+                .to_list()
+            )
+            return self._rerank(rows, query, limit)
+        except Exception as e:
+            print(f"Search error: {e}")
+            return [], []
+    
+    def _search_rows_many(self, query_embeddings: Sequence[List[float]], limit: int,
+                          binary: bool, candidates: Optional[int]
+                          ) -> List[Tuple[List[Dict[str, Any]], List[float]]]:
+        """One multi-vector LanceDB query; rows and scores per input query."""
+        out: List[Tuple[List[Dict[str, Any]], List[float]]] = [([], []) for _ in query_embeddings]
+        if not HAS_LANCEDB:
+            print("⚠️  lancedb not installed - cannot search. Run: pip install lancedb")
+            return out
+        
+        valid = [i for i, q in enumerate(query_embeddings) if len(q)]
+        if not valid:
+            return out
+        
+        try:
+            table = self._get_table()
+            if table is None:
+                return out
+            
+            queries = l2_normalize([query_embeddings[i] for i in valid])
+            use_bits = binary and "bits" in table.schema.names
+            if use_bits:
+                query = (
+                    table.search(binary_quantize(queries), vector_column_name="bits")
+                    .metric("hamming")
+                    .limit(candidates or limit * self.BINARY_RERANK_FACTOR)
                 )
-                for r in results
-            ]
+            else:
+                query = table.search(queries).metric(self._distance_metric(table))
+                if self._ann_metric:
+                    query = query.nprobes(self.nprobes)
+                query = query.limit(limit)
+            
+            # Rows come back tagged with the position of their query
+            grouped: List[List[Dict[str, Any]]] = [[] for _ in valid]
+            for row in query.to_list():
+                grouped[row.pop("query_index", 0)].append(row)
+            
+            for k, (slot, rows) in enumerate(zip(valid, grouped)):
+                if use_bits:
+                    out[slot] = self._rerank(rows, queries[k], limit)
+                else:
+                    out[slot] = (rows, [1 - r.get("_distance", 0) for r in rows])
         except Exception as e:
             print(f"Search error: {e}")
-            return []
+        
+        return out
+    
+    @staticmethod
+    def _rerank(rows: List[Dict[str, Any]], query: "np.ndarray",
+                limit: int) -> Tuple[List[Dict[str, Any]], List[float]]:
+        """Order Hamming candidates by fp16 inner product with the float query."""
+        if not rows:
+            return [], []
+        
+        vectors = np.asarray([r["vector"] for r in rows], dtype=np.float16)
+        scores = vectors.astype(np.float32) @ query
+        order = np.argsort(-scores)[:limit]
+        
+        return [rows[i] for i in order], [float(scores[i]) for i in order]
+    
+    def _package(self, rows: List[Dict[str, Any]], scores: List[float],
+                 as_batch: bool) -> Union[List[SearchResult], "SearchResultBatch"]:
+        """Return rows either as SearchResults or as one SearchResultBatch."""
+        if as_batch:
+            return SearchResultBatch.from_rows(rows, scores)
+        return [self._to_result(r, score) for r, score in zip(rows, scores)]
+    
+    @staticmethod
+    def _to_result(row: Dict[str, Any], score: float) -> SearchResult:
+        """Build a SearchResult from a LanceDB row."""
+        return SearchResult(
+            content=row["content"],
+            file_path=row["file_path"],
+            start_line=row["start_line"],
+            end_line=row["end_line"],
+            score=score,
+            symbol_name=row.get("symbol_name"),
+        )
+    
+    @staticmethod
+    def _schema(dim: int, binary: bool = False) -> "pa.Schema":
+        """Table schema with float vectors and, optionally, packed binary codes."""
+        fields = [
+            pa.field("vector", pa.list_(pa.float32(), dim)),
+            pa.field("content", pa.string()),
+            pa.field("file_path", pa.string()),
+            pa.field("start_line", pa.int64()),
+            pa.field("end_line", pa.int64()),
+            pa.field("chunk_type", pa.string()),
+            pa.field("symbol_name", pa.string()),
+        ]
+        if binary:
+            fields.append(pa.field("bits", pa.list_(pa.uint8(), (dim + 7) // 8)))
+        return pa.schema(fields, metadata={VectorStore._NORMALIZED_KEY: b"1"})
+    
+    def ensure_index(self, dim: Optional[int] = None) -> bool:
+        """
+        Make sure searches use an ANN index once the store is large enough.
+        
+        Adopts an index persisted by a previous run, otherwise builds an
+        IVF_PQ index once the table reaches ANN_MIN_ROWS - over dot products
+        for normalized tables, cosine for older ones. Cheap to
+        call after every insert: it does nothing while an index is active.
+        
+        Args:
+            dim: Vector dimension (read from the table schema when omitted)
+        
+        Returns:
+            True if searches go through an index
+        """
+        if self._ann_metric is not None:
+            return True
+        table = self._get_table()
+        if table is None:
+            return False
+        try:
+            if len(table) < self.ANN_MIN_ROWS:
+                return False
+        except Exception:
+            return False
+        return self.build_ann(metric=self._distance_metric(table), replace=False, dim=dim)
+    
+    def build_ann(self, metric: str = "ip", nlist: Optional[int] = None,
+                  replace: bool = True, dim: Optional[int] = None) -> bool:
+        """
+        Build an IVF_PQ approximate nearest neighbor index over stored vectors.
+        
+        Search falls back to a brute-force scan until an index exists, and
+        small stores (< ANN_MIN_ROWS) keep using it.
+        
+        Args:
+            metric: 'ip' (inner product), 'cosine' or 'l2'
+            nlist: Number of IVF partitions (default: 4 * sqrt(N), max 4096)
+            replace: Retrain even if the table already has a vector index
+            dim: Vector dimension (read from the table schema when omitted)
+        
+        Returns:
+            True if an index was built
+        """
+        table = self._get_table()
+        if table is None:
+            return False
+        
+        try:
+            n = len(table)
+            if n < self.ANN_MIN_ROWS:
+                return False
+            
+            dim = dim or table.schema.field("vector").type.list_size
+            distance = self._METRICS.get(metric, metric)
+            
+            if not replace and getattr(table, "list_indices", None) and table.list_indices():
+                # Reuse the persisted index from a previous run
+                self._ann_metric = distance
+                return True
+            
+            table.create_index(
+                metric=distance,
+                num_partitions=nlist or min(4096, int(4 * math.sqrt(n))),
+                num_sub_vectors=16 if dim % 16 == 0 else 1,
+                replace=True,
+            )
+            self._ann_metric = distance
+            return True
+        except Exception as e:
+            print(f"ANN index error: {e}")
+            return False
+    
+    def delete_files(self, file_paths: List[str]) -> None:
+        """Remove every chunk that came from the given files."""
+        if not HAS_LANCEDB or not file_paths:
+            return
+        table = self._get_table()
+        if table is None:
+            return
+        
+        try:
+            # Keep predicates a manageable size on large re-indexes
+            for i in range(0, len(file_paths), 500):
+                quoted = ", ".join(
+                    "'" + p.replace("'", "''") + "'" for p in file_paths[i:i + 500]
+                )
+                table.delete(f"file_path IN ({quoted})")
+            self._invalidate_matrix()
+        except Exception as e:
+            print(f"Vector store delete error: {e}")
     
     def clear(self):
         """Clear all data from the store."""
-        if HAS_LANCEDB and self.TABLE_NAME in self.db.table_names():
-            self.db.drop_table(self.TABLE_NAME)
+        with self._table_lock:
+            if HAS_LANCEDB and self.TABLE_NAME in self.db.table_names():
+                self.db.drop_table(self.TABLE_NAME)
+            self._table = None
+        self._ann_metric = None
+        self._invalidate_matrix()
+        for name in (self.MATRIX_FILE, self.SCALES_FILE, self.CORPUS_FILE):
+            try:
+                (self.db_path / name).unlink()
+            except FileNotFoundError:
+                pass
     
     def count(self) -> int:
         """Get number of chunks in store."""
-        if not HAS_LANCEDB:
-            return 0
-        if self.TABLE_NAME not in self.db.table_names():
+        table = self._get_table()
+        if table is None:
             return 0
         try:
-            table = self.db.open_table(self.TABLE_NAME)
             return len(table)
         except:
             return 0
@@ -14,9 +14,27 @@ window size doesn't equal effectiveness."
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 from enum import Enum
+import bisect
+import functools
+import os
 import re
+import threading
+
+import numpy as np
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 
 class ModelContextWindow(Enum):
@@ -40,6 +58,62 @@ class ModelContextWindow(Enum):
     GEMINI_1_5_PRO = 2000000
 
 
+# Normalized enum names (QWEN_7B -> "qwen7") -> window size, in enum order
+_MODEL_WINDOW_MAP: Dict[str, int] = {
+    m.name.lower().replace('_', '').replace('b', ''): m.value
+    for m in ModelContextWindow
+}
+
+
+def _greedy_fill(tokens, start: int, used: int, budget: int):
+    """
+    Greedy whole-item fill over token counts in ranked order.
+    
+    Takes every item from start on that still fits, and stops at the first
+    one that doesn't while budget remains, since the caller may truncate
+    it. Returns (taken positions, stop position, tokens used).
+    """
+    n = len(tokens)
+    taken = np.empty(n - start, dtype=np.int64)
+    count = 0
+    for i in range(start, n):
+        t = tokens[i]
+        if used + t <= budget:
+            taken[count] = i
+            count += 1
+            used += t
+        elif used < budget:
+            return taken[:count], i, used
+    return taken[:count], n, used
+
+
+if HAS_NUMBA:
+    _greedy_fill = numba.njit(cache=True, nogil=True)(_greedy_fill)
+
+
+@functools.lru_cache(maxsize=128)
+def _get_model_context_window(model: str) -> int:
+    """Get context window size for model."""
+    model_lower = model.lower()
+    
+    # Try to match known models
+    for key, window in _MODEL_WINDOW_MAP.items():
+        if key in model_lower:
+            return window
+    
+    # Try regex matching
+    if any(x in model_lower for x in ['claude', 'gpt-4.1', 'gemini-1.5']):
+        return 200000  # Conservative default for large models
+    elif any(x in model_lower for x in ['gpt-4', 'claude-opus']):
+        return 128000
+    elif '70b' in model_lower or '32b' in model_lower:
+        return 32768
+    elif '13b' in model_lower or '14b' in model_lower:
+        return 8192
+    
+    return 4096  # Conservative default
+
+
 @dataclass
 class TokenBudget:
     """Breakdown of token allocation."""
@@ -66,12 +140,22 @@ class TokenCounter:
     1. Character-based approximation (fast)
     2. Word-based approximation (more accurate)
     3. Regex-based for code (specialized)
+    
+    estimate_tokens_exact() counts real BPE tokens when tiktoken is
+    installed and falls back to the hybrid estimate otherwise.
     """
     
     # Rough estimates: 1 token ≈ 4 characters or 0.75 words
     CHAR_TO_TOKEN_RATIO = 4.0
     WORD_TO_TOKEN_RATIO = 0.75
     
+    # Encoding for models tiktoken does not know (e.g. local models)
+    DEFAULT_ENCODING = "cl100k_base"
+    
+    # Lazily loaded tiktoken encoders by model name (None = unavailable)
+    _encoders: Dict[str, Any] = {}
+    _encoders_lock = threading.Lock()
+    
     @classmethod
     def estimate_tokens(cls, text: str, method: str = "word") -> int:
         """
@@ -98,6 +182,61 @@ class TokenCounter:
         
         return 0
     
+    @classmethod
+    def _get_encoder(cls, model: str):
+        """tiktoken encoder for model, loaded once per model name."""
+        if not HAS_TIKTOKEN:
+            return None
+        
+        try:
+            return cls._encoders[model]
+        except KeyError:
+            pass
+        
+        with cls._encoders_lock:
+            if model not in cls._encoders:
+                try:
+                    encoder = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoder = None
+                try:
+                    encoder = encoder or tiktoken.get_encoding(cls.DEFAULT_ENCODING)
+                except Exception as e:
+                    # BPE files are fetched on first use and may be unreachable
+                    print(f"⚠️  tiktoken unavailable ({e}) - using estimated token counts")
+                cls._encoders[model] = encoder
+            return cls._encoders[model]
+    
+    @classmethod
+    def estimate_tokens_exact(cls, text: str, model: str = "gpt-4o") -> int:
+        """
+        Count tokens with the model's BPE tokenizer.
+        
+        Falls back to the hybrid estimate when tiktoken is not installed.
+        """
+        if not text:
+            return 0
+        
+        encoder = cls._get_encoder(model)
+        if encoder is None:
+            return cls.estimate_tokens(text, "hybrid")
+        return len(encoder.encode(text, disallowed_special=()))
+    
+    @classmethod
+    def estimate_tokens_exact_batch(cls, texts: List[str], model: str = "gpt-4o") -> List[int]:
+        """
+        Token counts for many texts; tiktoken encodes them across threads
+        in Rust, outside the GIL.
+        """
+        encoder = cls._get_encoder(model)
+        if encoder is None:
+            return [cls.estimate_tokens(t, "hybrid") for t in texts]
+        
+        encoded = encoder.encode_batch(
+            list(texts), num_threads=os.cpu_count() or 1, disallowed_special=(),
+        )
+        return [len(tokens) for tokens in encoded]
+    
     @classmethod
     def estimate_tokens_for_code(cls, code: str) -> int:
         """
@@ -116,14 +255,33 @@ class TokenCounter:
     
     @classmethod
     def estimate_tokens_for_context_items(cls, items: List[Dict]) -> int:
-        """Estimate total tokens for list of context items."""
-        total = 0
-        for item in items:
-            if 'content' in item:
-                total += cls.estimate_tokens(item['content'], "hybrid")
-            if 'metadata' in item:
-                total += cls.estimate_tokens(str(item['metadata']), "char")
-        return total
+        """
+        Estimate total tokens for list of context items.
+        
+        Same per-item result as estimate_tokens(content, "hybrid") plus
+        estimate_tokens(str(metadata), "char"), computed over length arrays
+        in one pass instead of per-item Python arithmetic.
+        """
+        if not items:
+            return 0
+        
+        contents = [item.get('content') or '' for item in items]
+        char_lens = np.fromiter(map(len, contents), dtype=np.int64, count=len(contents))
+        word_lens = np.fromiter(
+            (len(c.split()) for c in contents), dtype=np.int64, count=len(contents)
+        )
+        meta_lens = np.fromiter(
+            (len(str(item['metadata'])) for item in items if 'metadata' in item),
+            dtype=np.int64,
+        )
+        
+        # int() per item truncates, so floor before summing
+        content_tokens = np.maximum(
+            np.floor(word_lens / cls.WORD_TO_TOKEN_RATIO),
+            np.floor(char_lens / cls.CHAR_TO_TOKEN_RATIO),
+        )
+        meta_tokens = np.floor(meta_lens / cls.CHAR_TO_TOKEN_RATIO)
+        return int(content_tokens.sum() + meta_tokens.sum())
 
 
 class ContextWindowOptimizer:
@@ -138,6 +296,12 @@ class ContextWindowOptimizer:
     5. Low-relevance context (included if space remains)
     """
     
+    # Shortest prefix (in characters) a truncated item may keep. This is a
+    # policy floor, not an estimate: the prefix search is exact, so a
+    # shorter prefix could still fit the budget - it is dropped anyway,
+    # since a sliver of an item rarely helps and costs the marker's tokens.
+    MIN_TRUNCATED_CHARS = 100
+    
     def __init__(self, model: str, context_window: Optional[int] = None):
         self.model = model
         
@@ -145,28 +309,16 @@ class ContextWindowOptimizer:
         if context_window:
             self.context_window = context_window
         else:
-            self.context_window = self._get_model_context_window(model)
+            self.context_window = _get_model_context_window(model)
     
-    def _get_model_context_window(self, model: str) -> int:
-        """Get context window size for model."""
-        model_lower = model.lower()
-        
-        # Try to match known models
-        for enum_member in ModelContextWindow:
-            if enum_member.name.lower().replace('_', '').replace('b', '') in model_lower:
-                return enum_member.value
-        
-        # Try regex matching
-        if any(x in model_lower for x in ['claude', 'gpt-4.1', 'gemini-1.5']):
-            return 200000  # Conservative default for large models
-        elif any(x in model_lower for x in ['gpt-4', 'claude-opus']):
-            return 128000
-        elif '70b' in model_lower or '32b' in model_lower:
-            return 32768
-        elif '13b' in model_lower or '14b' in model_lower:
-            return 8192
-        
-        return 4096  # Conservative default
+    @staticmethod
+    def _count_tokens(text: str) -> int:
+        """
+        The one token counter used for a whole budget fit - whole items,
+        truncation search and truncated items - so the running total stays
+        in a single unit. Hybrid, like the token_count consumers downstream.
+        """
+        return TokenCounter.estimate_tokens(text, 'hybrid')
     
     def allocate_budget(self, 
                        system_prompt_tokens: int,
@@ -214,66 +366,99 @@ class ContextWindowOptimizer:
             token_budget: Maximum tokens available
         
         Returns:
-            (filtered_items, total_tokens_used)
+            (filtered_items, total_tokens_used); each selected item carries
+            its estimated size under 'token_count'
         """
         if not context_items:
             return [], 0
         
-        # Sort by priority (relevance + importance)
-        sorted_items = sorted(
-            context_items,
-            key=lambda x: (
-                x.get('relevance_score', 0) * 0.7 +
-                x.get('priority', 0.5) * 0.3
-            ),
-            reverse=True
+        n = len(context_items)
+        
+        # Sort by priority (relevance + importance) as one vector op;
+        # a stable argsort keeps input order among equal scores
+        relevance = np.fromiter(
+            (x.get('relevance_score', 0) for x in context_items), dtype=np.float64, count=n
+        )
+        priority = np.fromiter(
+            (x.get('priority', 0.5) for x in context_items), dtype=np.float64, count=n
         )
+        order = np.argsort(-(relevance * 0.7 + priority * 0.3), kind='stable')
         
-        selected = []
-        tokens_used = 0
+        tokens = np.fromiter(
+            (self._count_tokens(x.get('content', '')) for x in context_items),
+            dtype=np.int64, count=n,
+        )[order]
         
-        for item in sorted_items:
-            item_tokens = TokenCounter.estimate_tokens(
-                item.get('content', ''), 'hybrid'
-            )
+        # The leading run of items that fits whole is taken in one pass
+        cumulative = np.cumsum(tokens)
+        fit = int(np.searchsorted(cumulative, token_budget, side='right'))
+        
+        taken = [np.arange(fit)]
+        tokens_used = int(cumulative[fit - 1]) if fit else 0
+        
+        # Greedy fill of the remaining budget in the compiled kernel (numba
+        # when installed); it returns to Python only for items to truncate
+        ranked = order.tolist()
+        position = fit
+        truncations = {}
+        while position < n:
+            fitted, position, tokens_used = _greedy_fill(tokens, position, tokens_used, token_budget)
+            taken.append(fitted)
+            if position == n:
+                break
             
-            if tokens_used + item_tokens <= token_budget:
+            # Try to fit truncated version
+            truncated = self._truncate_to_fit(
+                context_items[ranked[position]],
+                token_budget - tokens_used
+            )
+            if truncated:
+                truncated_tokens = self._count_tokens(truncated.get('content', ''))
+                truncated['token_count'] = truncated_tokens
+                truncations[position] = truncated
+                tokens_used += truncated_tokens
+                taken.append(np.array([position]))
+            position += 1
+        
+        # Materialize the selected dicts outside the kernel, in rank order
+        selected = []
+        for pos in np.concatenate(taken).tolist():
+            if pos in truncations:
+                selected.append(truncations[pos])
+            else:
+                item = context_items[ranked[pos]]
+                item['token_count'] = int(tokens[pos])
                 selected.append(item)
-                tokens_used += item_tokens
-            elif tokens_used < token_budget:
-                # Try to fit truncated version
-                truncated = self._truncate_to_fit(
-                    item,
-                    token_budget - tokens_used
-                )
-                if truncated:
-                    selected.append(truncated)
-                    tokens_used += TokenCounter.estimate_tokens(
-                        truncated.get('content', ''), 'hybrid'
-                    )
-        
-        return selected, tokens_used
+        
+        return selected, int(tokens_used)
     
     def _truncate_to_fit(self, item: Dict, token_budget: int) -> Optional[Dict]:
-        """Truncate item content to fit token budget."""
+        """
+        Truncate item content to fit token budget.
+        
+        Returns None when the longest fitting prefix is shorter than
+        MIN_TRUNCATED_CHARS, even if that prefix would fit.
+        """
         content = item.get('content', '')
         if not content:
             return None
         
-        # Estimate chars per token
-        estimated_tokens = TokenCounter.estimate_tokens(content, 'hybrid')
-        if estimated_tokens <= token_budget:
+        count = self._count_tokens
+        if count(content) <= token_budget:
             return item
         
-        # Binary search for fitting length
-        ratio = token_budget / estimated_tokens
-        truncate_len = int(len(content) * ratio * 0.95)  # 95% to be safe
+        # Binary search for the longest prefix that fits, marker included
+        marker = "\n[... truncated ...]"
+        truncate_len = bisect.bisect_right(
+            range(len(content) + 1), token_budget,
+            key=lambda n: count(content[:n] + marker),
+        ) - 1
         
-        if truncate_len < 100:  # Don't truncate to nearly nothing
+        if truncate_len < self.MIN_TRUNCATED_CHARS:  # Don't truncate to nearly nothing
             return None
         
         truncated = item.copy()
-        truncated['content'] = content[:truncate_len] + "\n[... truncated ...]"
+        truncated['content'] = content[:truncate_len] + marker
         truncated['truncated'] = True
         
         return truncated
@@ -310,25 +495,25 @@ def format_context_for_model(
     
     Balances readability with token efficiency.
     """
-    formatted_parts = []
-    
-    formatted_parts.append("=== RETRIEVED CONTEXT ===\n")
+    formatted_parts = ["=== RETRIEVED CONTEXT ===\n"]
+    rule = "-" * max_width  # Sliced per item instead of rebuilt
     
     for idx, item in enumerate(context_items, 1):
         file_path = item.get('file_path', 'unknown')
         relevance = item.get('relevance_score', 0)
         
         formatted_parts.append(f"\n[{idx}] {file_path} (relevance: {relevance:.2f})")
-        formatted_parts.append("-" * min(max_width, len(file_path) + 20))
+        formatted_parts.append(rule[:len(file_path) + 20])
         
         content = item.get('content', '')
         if item.get('truncated'):
             formatted_parts.append(content)
         else:
             # Add line numbers for code
-            lines = content.split('\n')
             start_line = item.get('start_line', 1)
-            for i, line in enumerate(lines, start_line):
-                formatted_parts.append(f"{i:4d} | {line}")
+            formatted_parts.extend([
+                f"{i:4d} | {line}"
+                for i, line in enumerate(content.split('\n'), start_line)
+            ])
     
     return "\n".join(formatted_parts)
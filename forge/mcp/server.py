@@ -7,9 +7,13 @@ VS Code extensions, and other MCP clients.
 Based on: Anthropic's Model Context Protocol specification.
 """
 
+import functools
 import json
+import os
 import sys
-from typing import Dict, Any, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 from forge.tools.file_tools import FileTools
@@ -17,6 +21,22 @@ from forge.tools.terminal import Terminal
 from forge.tools.web_search import WebSearch
 from forge.context.enhanced_retriever import EnhancedContextRetriever
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+if HAS_ORJSON:
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+else:
+    _loads = json.loads
+    
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 
 class MCPServer:
     """
@@ -33,6 +53,10 @@ class MCPServer:
         https://modelcontextprotocol.io/
     """
     
+    # Requests handled concurrently by run_stdio. Tool calls mostly wait
+    # on subprocesses, HTTP and disk, so allow a few more than the cores.
+    MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+    
     def __init__(self, workspace: str):
         self.workspace = Path(workspace)
         
@@ -41,6 +65,9 @@ class MCPServer:
         self.terminal = Terminal(workspace)
         self.web = WebSearch()
         self.retriever = EnhancedContextRetriever(workspace)
+        
+        # One response line at a time on stdout
+        self._out_lock = threading.Lock()
     
     def get_tools(self) -> List[Dict[str, Any]]:
         """Return tool definitions in MCP format."""
@@ -147,26 +174,142 @@ class MCPServer:
         else:
             return f"Unknown tool: {name}"
     
+    @functools.cached_property
+    def _batch_pool(self) -> ThreadPoolExecutor:
+        """
+        Workers for the calls inside a tools/call_batch request.
+        
+        Separate from run_stdio's request pool: a batch waits on its calls,
+        and queueing them behind other requests on the same pool could
+        leave every worker waiting.
+        """
+        return ThreadPoolExecutor(max_workers=self.MAX_WORKERS,
+                                  thread_name_prefix="forge-mcp-batch")
+    
+    def call_tools(self, calls: List[Dict[str, Any]]) -> List[str]:
+        """
+        Execute several independent tool calls concurrently.
+        
+        Results line up with calls; a failing call yields an error string
+        in its slot instead of failing the batch.
+        """
+        def run(call: Dict[str, Any]) -> str:
+            try:
+                return self.call_tool(*self._unpack_call(call))
+            except Exception as e:
+                return f"Error: {e}"
+        
+        results: List[Optional[str]] = [None] * len(calls)
+        
+        # search_codebase calls with the same limit share one vector search;
+        # a malformed entry only fails its own slot
+        searches: Dict[int, List[int]] = {}
+        for i, call in enumerate(calls):
+            try:
+                name, arguments = self._unpack_call(call)
+                if name != "search_codebase" or "query" not in arguments:
+                    continue
+                if not isinstance(arguments["query"], str):
+                    raise ValueError("query must be a string")
+                max_results = arguments.get("max_results", 5)
+                if not isinstance(max_results, int) or isinstance(max_results, bool):
+                    raise ValueError("max_results must be an integer")
+                searches.setdefault(max_results, []).append(i)
+            except Exception as e:
+                results[i] = f"Error: {e}"
+        for max_results, indices in searches.items():
+            if len(indices) > 1:
+                self._search_many(calls, indices, max_results, results)
+        
+        pending = [i for i, r in enumerate(results) if r is None]
+        if len(pending) <= 1:
+            outputs = [run(calls[i]) for i in pending]
+        else:
+            outputs = self._batch_pool.map(run, [calls[i] for i in pending])
+        for i, output in zip(pending, outputs):
+            results[i] = output
+        return results
+    
+    @staticmethod
+    def _unpack_call(call: Any) -> Tuple[str, Dict[str, Any]]:
+        """(name, arguments) of one call_tools entry, validating its shape."""
+        if not isinstance(call, dict):
+            raise ValueError("tool call must be an object")
+        arguments = call.get("arguments", {})
+        if not isinstance(arguments, dict):
+            raise ValueError("arguments must be an object")
+        return call.get("name"), arguments
+    
+    def _search_many(self, calls: List[Dict[str, Any]], indices: List[int],
+                     max_results: int, results: List[Optional[str]]):
+        """Fill results[indices] from one retrieve_many() over their queries."""
+        try:
+            contexts = self.retriever.retrieve_many(
+                [calls[i]["arguments"]["query"] for i in indices],
+                max_results=max_results,
+            )
+            for i, ctx in zip(indices, contexts):
+                results[i] = ctx.formatted
+        except Exception as e:
+            for i in indices:
+                results[i] = f"Error: {e}"
+    
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch one parsed request and build its response."""
+        method = request.get("method")
+        
+        if method == "tools/list":
+            response = {"tools": self.get_tools()}
+        elif method == "tools/call":
+            params = request.get("params", {})
+            result = self.call_tool(params.get("name"), params.get("arguments", {}))
+            response = {"content": [{"type": "text", "text": result}]}
+        elif method == "tools/call_batch":
+            calls = request.get("params", {}).get("calls", [])
+            results = self.call_tools(calls)
+            response = {"content": [{"type": "text", "text": r} for r in results]}
+        else:
+            response = {"error": f"Unknown method: {method}"}
+        
+        return response
+    
     def run_stdio(self):
-        """Run the MCP server over stdio."""
+        """
+        Run the MCP server over stdio.
+        
+        Requests are read sequentially and handled on a thread pool, so a
+        slow tool call does not hold up the ones behind it. Responses can
+        therefore arrive out of order; each echoes its request's "id".
+        """
         # Initialize retriever
         self.retriever.index()
         
-        for line in sys.stdin:
-            try:
-                request = json.loads(line)
-                method = request.get("method")
-                
-                if method == "tools/list":
-                    response = {"tools": self.get_tools()}
-                elif method == "tools/call":
-                    params = request.get("params", {})
-                    result = self.call_tool(params.get("name"), params.get("arguments", {}))
-                    response = {"content": [{"type": "text", "text": result}]}
-                else:
-                    response = {"error": f"Unknown method: {method}"}
-                
-                print(json.dumps(response), flush=True)
-            except Exception as e:
-                print(json.dumps({"error": str(e)}), flush=True)
-
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS,
+                                thread_name_prefix="forge-mcp") as pool:
+            # Requests are parsed straight from bytes; no text decoding layer
+            for line in sys.stdin.buffer:
+                try:
+                    request = _loads(line)
+                except Exception as e:
+                    self._write({"error": str(e)})
+                    continue
+                pool.submit(self._serve, request)
+    
+    def _serve(self, request: Dict[str, Any]):
+        """Handle a request on a worker thread and write its response."""
+        try:
+            response = self.handle_request(request)
+        except Exception as e:
+            response = {"error": str(e)}
+        
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        self._write(response)
+    
+    def _write(self, response: Dict[str, Any]):
+        """Write one response line; the lock keeps lines from interleaving."""
+        line = _dumps(response) + b"\n"
+        with self._out_lock:
+            sys.stdout.flush()  # Anything printed as text goes out first
+            sys.stdout.buffer.write(line)
+            sys.stdout.buffer.flush()
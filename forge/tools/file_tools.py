@@ -5,11 +5,143 @@ Safe file operations with validation.
 """
 
 import os
-import difflib
+import fnmatch
+import functools
+import itertools
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Optional, List
+from typing import Iterator, Optional, List, Sequence, Tuple
 from dataclasses import dataclass
 
+try:
+    from cdifflib import CSequenceMatcher as _SequenceMatcher
+    HAS_CDIFFLIB = True
+except ImportError:
+    from difflib import SequenceMatcher as _SequenceMatcher
+    HAS_CDIFFLIB = False
+
+
+# Directories list_files never descends into (besides hidden ones)
+_SKIP_DIRS = frozenset({"node_modules", "__pycache__"})
+
+# Maximum number of paths list_files returns
+_LIST_LIMIT = 100
+
+# Process umask, read once: mkstemp creates files 0600, and new files
+# should get the mode a plain open() would have given them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _walk_sorted(root: str, prefix: str = "") -> Iterator[str]:
+    """
+    Yield files under root as '/'-joined paths relative to it, in sorted
+    order, pruning hidden and _SKIP_DIRS directories before descending.
+    
+    Entries are visited by name, with directories keyed as 'name/', which
+    makes the DFS order identical to sorting the full path strings - so
+    callers can stop early instead of collecting and sorting everything.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = []
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir and entry.name in _SKIP_DIRS:
+                    continue
+                entries.append((entry.name + "/" if is_dir else entry.name, is_dir, entry))
+    except OSError:
+        return
+    
+    entries.sort(key=lambda e: e[0])
+    for key, is_dir, entry in entries:
+        if is_dir:
+            yield from _walk_sorted(entry.path, prefix + key)
+        else:
+            try:
+                if entry.is_file():
+                    yield prefix + key
+            except OSError:
+                continue
+
+
+@functools.lru_cache(maxsize=64)
+def _rglob_segments(pattern: str) -> Tuple[str, ...]:
+    """Segments of the pattern rglob(pattern) matches: '**/' + pattern."""
+    return ("**",) + tuple(p for p in pattern.split("/") if p not in ("", "."))
+
+
+def _match_segments(parts: Sequence[str], i: int, segments: Tuple[str, ...], j: int) -> bool:
+    """Glob-match parts[i:] against segments[j:]; '**' spans zero or more parts."""
+    while j < len(segments):
+        segment = segments[j]
+        if segment == "**":
+            # Collapse runs of '**', then try every split point
+            while j + 1 < len(segments) and segments[j + 1] == "**":
+                j += 1
+            return any(_match_segments(parts, k, segments, j + 1) for k in range(i, len(parts) + 1))
+        if i == len(parts) or not fnmatch.fnmatchcase(parts[i], segment):
+            return False
+        i += 1
+        j += 1
+    return i == len(parts)
+
+
+def _match_path(rel: str, pattern: str) -> bool:
+    """Match a '/'-joined relative path the way rglob(pattern) would."""
+    segments = _rglob_segments(pattern)
+    if segments[-1] == "**":
+        return False  # A trailing '**' selects directories only
+    return _match_segments(rel.split("/"), 0, segments, 0)
+
+
+def _match_name(rel: str, pattern: str) -> bool:
+    """Match the file name of a '/'-joined relative path against a glob."""
+    return fnmatch.fnmatchcase(rel.rpartition("/")[2], pattern)
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Hunk range in unified diff ("ed") format."""
+    beginning = start + 1  # Lines are numbered from one
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1  # Empty ranges begin at the line before
+    return f"{beginning},{length}"
+
+
+def _unified_diff(a: List[str], b: List[str], fromfile: str, tofile: str,
+                  n: int = 3) -> Iterator[str]:
+    """
+    Same output as difflib.unified_diff, driven by the C sequence matcher
+    from cdifflib when it is installed.
+    """
+    started = False
+    for group in _SequenceMatcher(None, a, b).get_grouped_opcodes(n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}\n"
+            yield f"+++ {tofile}\n"
+        
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range(first[1], last[2])} +{_format_range(first[3], last[4])} @@\n"
+        
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                yield from (" " + line for line in a[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                yield from ("-" + line for line in a[i1:i2])
+            if tag in ("replace", "insert"):
+                yield from ("+" + line for line in b[j1:j2])
+
 
 @dataclass
 class FileDiff:
@@ -32,15 +164,22 @@ class FileTools:
     
     def __init__(self, workspace: str):
         self.workspace = Path(workspace).resolve()
+        self._workspace_str = str(self.workspace)
     
     def _validate_path(self, path: str) -> Path:
-        """Ensure path is within workspace."""
-        full_path = (self.workspace / path).resolve()
+        """
+        Ensure path is within workspace.
         
-        if not str(full_path).startswith(str(self.workspace)):
+        Resolved on every call, never cached: symlinks and directories can
+        change underneath us (commands, git, the user), and the containment
+        check must see the filesystem as it is now.
+        """
+        full_path = os.path.realpath(os.path.join(self._workspace_str, path))
+        
+        if not full_path.startswith(self._workspace_str):
             raise ValueError(f"Path escapes workspace: {path}")
         
-        return full_path
+        return Path(full_path)
     
     def read(self, path: str, max_lines: Optional[int] = None) -> str:
         """Read a file's contents."""
@@ -50,18 +189,36 @@ class FileTools:
             return f"Error: File not found: {path}"
         
         try:
-            content = full_path.read_text(encoding="utf-8", errors="ignore")
-            
             if max_lines:
-                lines = content.split("\n")
-                if len(lines) > max_lines:
-                    content = "\n".join(lines[:max_lines])
-                    content += f"\n... ({len(lines) - max_lines} more lines)"
-            
-            return content
+                return self._read_head(full_path, max_lines)
+            return full_path.read_text(encoding="utf-8", errors="ignore")
         except Exception as e:
             return f"Error reading file: {e}"
     
+    @staticmethod
+    def _read_head(full_path: Path, max_lines: int) -> str:
+        """
+        First max_lines lines plus a count of the rest, streamed so only
+        the head is held in memory.
+        """
+        with full_path.open("r", encoding="utf-8", errors="ignore") as f:
+            head = list(itertools.islice(f, max_lines))
+            if len(head) < max_lines:
+                return "".join(head)
+            
+            last, rest = head[-1], 0
+            for last in f:
+                rest += 1
+        
+        # Counted like content.split("\n"): a trailing newline ends in an empty line
+        remaining = rest + (1 if last.endswith("\n") else 0)
+        content = "".join(head)
+        if not remaining:
+            return content
+        if content.endswith("\n"):
+            content = content[:-1]
+        return content + f"\n... ({remaining} more lines)"
+    
     def write(self, path: str, content: str, create_dirs: bool = True) -> str:
         """Write content to a file."""
         full_path = self._validate_path(path)
@@ -70,15 +227,41 @@ class FileTools:
             if create_dirs:
                 full_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Backup existing file
-            if full_path.exists():
+            existed = full_path.exists()
+            
+            # Backup existing file. The new content is renamed into place
+            # below, so a hard link keeps the old bytes without copying them.
+            if existed:
                 backup_path = full_path.with_suffix(full_path.suffix + ".bak")
-                backup_path.write_text(
-                    full_path.read_text(encoding="utf-8", errors="ignore"),
-                    encoding="utf-8"
-                )
+                try:
+                    backup_path.unlink()
+                except FileNotFoundError:
+                    pass
+                try:
+                    os.link(full_path, backup_path)
+                except (OSError, NotImplementedError):
+                    shutil.copyfile(full_path, backup_path)
             
-            full_path.write_text(content, encoding="utf-8")
+            # Write to a uniquely named sibling temp file and rename, so
+            # readers never see a partially written file and concurrent
+            # writes to the same path can't share a temp file
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=full_path.name + ".", suffix=".tmp", dir=full_path.parent,
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(content)
+                if existed:
+                    shutil.copymode(full_path, tmp_name)
+                else:
+                    os.chmod(tmp_name, 0o666 & ~_UMASK)
+                os.replace(tmp_name, full_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except FileNotFoundError:
+                    pass
+                raise
             return f"Successfully wrote to {path}"
         except Exception as e:
             return f"Error writing file: {e}"
@@ -92,18 +275,21 @@ class FileTools:
         else:
             original = ""
         
-        diff_lines = difflib.unified_diff(
-            original.splitlines(keepends=True),
-            new_content.splitlines(keepends=True),
-            fromfile=f"a/{path}",
-            tofile=f"b/{path}",
-        )
+        if original == new_content:
+            unified = ""  # Nothing to match
+        else:
+            unified = "".join(_unified_diff(
+                original.splitlines(keepends=True),
+                new_content.splitlines(keepends=True),
+                fromfile=f"a/{path}",
+                tofile=f"b/{path}",
+            ))
         
         return FileDiff(
             path=path,
             original=original,
             modified=new_content,
-            unified_diff="".join(diff_lines),
+            unified_diff=unified,
         )
     
     def list_files(self, path: str = ".", pattern: str = "*") -> List[str]:
@@ -116,22 +302,34 @@ class FileTools:
         if not full_path.is_dir():
             return [str(full_path.relative_to(self.workspace))]
         
-        files = []
-        for f in full_path.rglob(pattern):
-            if f.is_file():
-                rel_path = str(f.relative_to(self.workspace))
-                # Skip hidden and common ignore patterns
-                if not any(p.startswith('.') for p in Path(rel_path).parts):
-                    if 'node_modules' not in rel_path and '__pycache__' not in rel_path:
-                        files.append(rel_path)
+        base = full_path.relative_to(self.workspace)
+        # Skip hidden and common ignore patterns
+        if any(p.startswith('.') or p in _SKIP_DIRS for p in base.parts):
+            return []
         
-        return sorted(files)[:100]  # Limit results
+        # Path patterns are matched segment-wise like rglob's '**/' + pattern
+        matches = _match_path if "/" in pattern or pattern == "**" else _match_name
+        
+        # The walk is already in sorted order, so stop at the limit
+        found = (rel for rel in _walk_sorted(str(full_path)) if matches(rel, pattern))
+        return [
+            str(base / rel) if base.parts else rel
+            for rel in itertools.islice(found, _LIST_LIMIT)
+        ]
     
     def exists(self, path: str) -> bool:
-        """Check if a file exists."""
+        """
+        Check if a file exists.
+        
+        Containment is checked on the realpath, so symlinks pointing out of
+        the workspace can't be used to probe for outside files.
+        """
+        workspace = self._workspace_str
         try:
-            full_path = self._validate_path(path)
-            return full_path.exists()
-        except:
+            full_path = os.path.realpath(os.path.join(workspace, path))
+        except ValueError:  # e.g. embedded null byte
             return False
-
+        
+        if full_path != workspace and not full_path.startswith(workspace + os.sep):
+            return False
+        return os.path.exists(full_path)
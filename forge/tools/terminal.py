@@ -4,14 +4,157 @@ Terminal/shell command execution.
 Safe command execution with output capture.
 """
 
+import codecs
+import functools
+import os
+import re
+import selectors
 import subprocess
 import shlex
+import time
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple, Union
 from dataclasses import dataclass
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
 
-@dataclass
+
+# Bytes (not characters) of output kept per stream; the rest is read and
+# discarded while the command runs to completion
+_STDOUT_LIMIT = 10000
+_STDERR_LIMIT = 5000
+
+_READ_SIZE = 8192
+
+
+def _danger_automaton(patterns: Iterable[str]):
+    """Aho-Corasick automaton over the lowercased patterns."""
+    automaton = ahocorasick.Automaton()
+    for pattern in patterns:
+        automaton.add_word(pattern.lower(), pattern)
+    automaton.make_automaton()
+    return automaton
+
+
+def _substring_union(patterns: Iterable[str]) -> Pattern:
+    """Literal substrings as one alternation regex (fallback without pyahocorasick)."""
+    return re.compile("|".join(re.escape(p.lower()) for p in patterns))
+
+
+# Shell control operators, as shlex emits them with punctuation_chars=True
+_CONTROL_CHARS = frozenset("();<>|&")
+
+# Characters a shell would glob- or tilde-expand; safe commands run
+# without a shell, so they'd arrive literally
+_EXPANSION_CHARS = frozenset("*?[~")
+
+# find actions that run commands, delete or write files
+_FIND_UNSAFE_ARGS = frozenset({"-exec", "-execdir", "-ok", "-okdir", "-delete", "-fls"})
+
+
+def _safe_argv_rules(commands: Iterable[str]) -> Tuple[FrozenSet[str], Dict[str, FrozenSet[str]]]:
+    """
+    Split safe command strings into binaries allowed with any arguments
+    ("ls") and binaries only allowed with given first arguments ("git log").
+    """
+    bins, subcommands = set(), {}
+    for command in commands:
+        argv = command.lower().split()
+        if len(argv) == 1:
+            bins.add(argv[0])
+        else:
+            subcommands.setdefault(argv[0], set()).add(argv[1])
+    return frozenset(bins), {b: frozenset(s) for b, s in subcommands.items()}
+
+
+def _shell_tokens(command: str) -> Optional[List[str]]:
+    """
+    Tokenize command the way a POSIX shell would, with control operators
+    (';', '|', '&&', '>', ...) as separate tokens. None if it doesn't parse.
+    """
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        return list(lexer)
+    except ValueError:
+        return None
+
+
+def _decode(data: Union[bytes, bytearray], limit: int) -> str:
+    """
+    Decode captured output with text-mode newline handling.
+    
+    Output that hit its byte limit may end mid-character; that partial
+    sequence is dropped rather than decoded into a replacement character.
+    """
+    if len(data) >= limit:
+        text = codecs.getincrementaldecoder("utf-8")(errors="replace").decode(data, final=False)
+    else:
+        text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _run_capped(args, shell: bool, cwd: Path,
+                timeout: float) -> Tuple[int, Union[bytes, bytearray], Union[bytes, bytearray]]:
+    """
+    Run a process, keeping at most _STDOUT_LIMIT/_STDERR_LIMIT bytes of its
+    output. Pipes are read in bounded chunks and the excess is discarded as
+    it arrives, so huge outputs never sit in memory.
+    
+    The caps only limit what is kept: the process is neither killed nor cut
+    off when they are reached, but keeps running (and its pipes keep being
+    drained) until it exits or the timeout hits, so its exit code is the
+    one it would have had uncapped.
+    
+    Raises subprocess.TimeoutExpired (after killing the process) on timeout.
+    """
+    if os.name == "nt":
+        # Selectors only work on sockets on Windows
+        result = subprocess.run(args, shell=shell, cwd=cwd, capture_output=True, timeout=timeout)
+        return result.returncode, result.stdout[:_STDOUT_LIMIT], result.stderr[:_STDERR_LIMIT]
+    
+    deadline = time.monotonic() + timeout
+    with subprocess.Popen(args, shell=shell, cwd=cwd,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        stdout, stderr = bytearray(), bytearray()
+        
+        # A selector rather than select.select(), which fails on fds past
+        # FD_SETSIZE - reachable in the long-running MCP server
+        with selectors.DefaultSelector() as selector:
+            selector.register(proc.stdout, selectors.EVENT_READ, (stdout, _STDOUT_LIMIT))
+            selector.register(proc.stderr, selectors.EVENT_READ, (stderr, _STDERR_LIMIT))
+            
+            try:
+                while selector.get_map():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(args, timeout)
+                    for key, _ in selector.select(remaining):
+                        chunk = os.read(key.fd, _READ_SIZE)
+                        if not chunk:
+                            selector.unregister(key.fileobj)
+                            continue
+                        buf, limit = key.data
+                        room = limit - len(buf)
+                        if room > 0:
+                            buf += chunk[:room]
+                
+                returncode = proc.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                raise
+    
+    # Handed to _decode as-is; copying to bytes first would be wasted work
+    return returncode, stdout, stderr
+
+
+@dataclass(frozen=True, slots=True)
 class CommandResult:
     """Result of command execution."""
     command: str
@@ -33,19 +176,26 @@ class Terminal:
     """
     
     # Commands safe to auto-execute in auto mode
-    SAFE_COMMANDS = [
+    SAFE_COMMANDS = (
         "ls", "dir", "pwd", "cat", "head", "tail", "grep", "find",
         "git status", "git log", "git diff", "git branch",
         "npm list", "pip list", "python --version", "node --version",
-    ]
+    )
     
-    # Commands that need confirmation
-    DANGEROUS_PATTERNS = [
-        "rm ", "del ", "rmdir", "format", "mkfs",
-        "drop ", "delete ", "truncate",
+    # Commands that need confirmation, most frequently hit first
+    DANGEROUS_PATTERNS = (
         "> ", ">>",  # Redirects
-        "sudo", "su ",
-    ]
+        "rm ", "sudo",
+        "del ", "rmdir", "format", "mkfs",
+        "drop ", "delete ", "truncate",
+        "su ",
+    )
+    
+    # Matchers built once from the lists above, so each check is a single
+    # pass over the command
+    _DANGER_AC = _danger_automaton(DANGEROUS_PATTERNS) if HAS_AHOCORASICK else None
+    _DANGER_RE = _substring_union(DANGEROUS_PATTERNS)
+    _SAFE_BINS, _SAFE_SUBCOMMANDS = _safe_argv_rules(SAFE_COMMANDS)
     
     def __init__(self, workspace: str, auto_mode: bool = False):
         self.workspace = Path(workspace)
@@ -56,26 +206,33 @@ class Terminal:
         command: str,
         timeout: int = 30,
         cwd: Optional[str] = None,
+        _argv: Optional[Tuple[str, ...]] = None,
     ) -> CommandResult:
-        """Run a command and capture output."""
+        """
+        Run a command and capture output.
+        
+        _argv is for callers that already hold _safe_argv(command).
+        """
         work_dir = Path(cwd) if cwd else self.workspace
         
+        # Safe commands are exec'd directly, as exactly the argv that was
+        # checked; only unchecked commands (user-confirmed) go to a shell
+        argv = _argv if _argv is not None else self._safe_argv(command)
+        
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
+            returncode, stdout, stderr = _run_capped(
+                list(argv) if argv else command,
+                shell=not argv,
                 cwd=work_dir,
-                capture_output=True,
-                text=True,
                 timeout=timeout,
             )
             
             return CommandResult(
                 command=command,
-                exit_code=result.returncode,
-                stdout=result.stdout[:10000],  # Limit output
-                stderr=result.stderr[:5000],
-                success=result.returncode == 0,
+                exit_code=returncode,
+                stdout=_decode(stdout, _STDOUT_LIMIT),
+                stderr=_decode(stderr, _STDERR_LIMIT),
+                success=returncode == 0,
             )
         except subprocess.TimeoutExpired:
             return CommandResult(
@@ -96,19 +253,57 @@ class Terminal:
     
     def is_safe(self, command: str) -> bool:
         """Check if a command is safe to auto-execute."""
-        cmd_lower = command.lower().strip()
+        return self._safe_argv(command) is not None
+    
+    def _safe_argv(self, command: str) -> Optional[Tuple[str, ...]]:
+        """
+        The argv a safe command is exec'd with (no shell), or None if the
+        command is not safe to auto-execute.
+        """
+        if "\n" in command or "\r" in command:
+            return None  # Line breaks start another command in a shell
+        return self._safe_argv_cached(command.strip())
+    
+    @classmethod
+    @functools.lru_cache(maxsize=512)
+    def _safe_argv_cached(cls, command: str) -> Optional[Tuple[str, ...]]:
+        """
+        _safe_argv for an already stripped command.
         
+        Agents re-check the same commands constantly (run, run_safe,
+        should_auto_execute, retries), and the answer only depends on the
+        class-level pattern lists. The argv keeps the command's case, so
+        what runs is exactly what was checked.
+        """
         # Check for dangerous patterns
-        for pattern in self.DANGEROUS_PATTERNS:
-            if pattern in cmd_lower:
-                return False
+        cmd_lower = command.lower()
+        if cls._DANGER_AC is not None:
+            if next(cls._DANGER_AC.iter(cmd_lower), None) is not None:
+                return None
+        elif cls._DANGER_RE.search(cmd_lower):
+            return None
         
-        # Check if it's a known safe command
-        for safe in self.SAFE_COMMANDS:
-            if cmd_lower.startswith(safe):
-                return True
+        # Check if it's a known safe command, by argv rather than string
+        # prefix: "lsblk" is not "ls", and "git log" allows "git log -p"
+        tokens = _shell_tokens(command)
+        if not tokens:
+            return None
+        if any(all(c in _CONTROL_CHARS for c in t) or "`" in t or "$" in t for t in tokens):
+            return None  # Chaining, pipes, redirects, expansion or substitution
+        if any(c in _EXPANSION_CHARS for t in tokens for c in t):
+            return None  # Needs a shell to glob or expand ~
         
-        return False
+        binary = tokens[0]
+        if binary == "find" and any(
+            t in _FIND_UNSAFE_ARGS or t.startswith("-fprint") for t in tokens[1:]
+        ):
+            return None
+        allowed = cls._SAFE_SUBCOMMANDS.get(binary)
+        if binary in cls._SAFE_BINS or (
+            allowed is not None and len(tokens) > 1 and tokens[1] in allowed
+        ):
+            return tuple(tokens)
+        return None
     
     def should_auto_execute(self, command: str) -> bool:
         """Check if command should auto-execute in auto mode."""
@@ -120,10 +315,11 @@ class Terminal:
         
         Returns (executed, result_or_warning).
         """
-        if not self.is_safe(command):
+        argv = self._safe_argv(command)
+        if argv is None:
             return False, f"Command requires confirmation: {command}"
         
-        result = self.run(command, timeout)
+        result = self.run(command, timeout, _argv=argv)
         
         if result.success:
             return True, result.stdout
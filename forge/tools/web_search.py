@@ -4,20 +4,105 @@ Web search using DuckDuckGo (free, no API key).
 Provides web search capability for external information.
 """
 
+import asyncio
 import re
+import threading
+import time
 import urllib.parse
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Iterator, List, Optional
 from dataclasses import dataclass
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
     from bs4 import BeautifulSoup
-    HAS_DEPS = True
+    HAS_BS4 = True
 except ImportError:
-    HAS_DEPS = False
+    HAS_BS4 = False
+
+try:
+    from lxml import etree, html as lxml_html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+# Only advertise brotli when a decoder is importable (urllib3 and aiohttp
+# both pick up either package)
+try:
+    import brotli  # noqa: F401
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+# Fetching needs requests; parsing needs selectolax, lxml or BeautifulSoup
+HAS_DEPS = HAS_REQUESTS and (HAS_SELECTOLAX or HAS_LXML or HAS_BS4)
+
+
+# Target URL inside a DuckDuckGo redirect link
+_UDDG_RE = re.compile(r'uddg=([^&]+)')
+
+
+# Start of every result container's class attribute ("result" or
+# "result results_links ..."), and of a few non-result ones like "result__a"
+_RESULT_SENTINEL = 'class="result'
+
+
+def _results_prefix(html: str, limit: int) -> str:
+    """
+    html cut just before the (limit+1)-th result container, so the parser
+    skips the tail of the page; the whole page if there are fewer results.
+    """
+    count, pos = 0, 0
+    width = len(_RESULT_SENTINEL)
+    while True:
+        pos = html.find(_RESULT_SENTINEL, pos)
+        if pos < 0:
+            return html
+        end = pos + width
+        # Only the "result" class itself, not result__a / results
+        if html[end:end + 1] in ('"', " "):
+            count += 1
+            if count > limit:
+                tag_start = html.rfind("<", 0, pos)
+                return html[:tag_start if tag_start >= 0 else pos]
+        pos = end
+
 
+def _class_xpath(name: str) -> str:
+    """XPath test equivalent to the CSS class selector '.name'."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
 
-@dataclass
+
+if HAS_LXML:
+    # Compiled once; the lxml parser path evaluates these per result
+    _RESULT_XPATH = etree.XPath(f"//*[{_class_xpath('result')}]")
+    _TITLE_XPATH = etree.XPath(f".//*[{_class_xpath('result__a')}]")
+    _SNIPPET_XPATH = etree.XPath(f".//*[{_class_xpath('result__snippet')}]")
+
+
+@dataclass(frozen=True, slots=True)
 class SearchResult:
     """A search result."""
     title: str
@@ -42,11 +127,59 @@ class WebSearch:
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         "Accept": "text/html,application/xhtml+xml",
         "Accept-Language": "en-US,en;q=0.9",
+        # Compressed bodies are a fraction of the size; decoding is automatic
+        "Accept-Encoding": "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate",
     }
     
+    # Parsed results are kept per (query, limit) for CACHE_TTL seconds
+    CACHE_SIZE = 128
+    CACHE_TTL = 300.0
+    
     def __init__(self, max_results: int = 5, timeout: int = 10):
         self.max_results = max_results
         self.timeout = timeout
+        
+        # Pooled keep-alive connections: the TLS handshake is paid once,
+        # not per query
+        self._session = None
+        if HAS_REQUESTS:
+            self._session = requests.Session()
+            self._session.headers.update(self.HEADERS)
+            self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def close(self):
+        """Release pooled connections."""
+        if self._session is not None:
+            self._session.close()
+    
+    def clear_cache(self):
+        """Drop all cached results."""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def _cache_get(self, key: tuple) -> Optional[tuple]:
+        """Cached results for key, or None if missing or expired."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.monotonic() - stored_at > self.CACHE_TTL:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return results
+    
+    def _cache_put(self, key: tuple, results: List[SearchResult]):
+        """Store results for key, evicting the least recently used entry."""
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), tuple(results))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
     
     def search(self, query: str, max_results: Optional[int] = None) -> List[SearchResult]:
         """Search DuckDuckGo and return results."""
@@ -55,22 +188,166 @@ class WebSearch:
         
         limit = max_results or self.max_results
         
+        key = (query, limit)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return list(cached)
+        
         try:
-            response = requests.post(
+            response = self._session.post(
                 self.SEARCH_URL,
                 data={"q": query, "b": ""},
-                headers=self.HEADERS,
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            return self._parse_results(response.text, limit)
+            results = self._parse_results(response.text, limit)
+        except Exception as e:
+            print(f"Web search error: {e}")
+            return []
+        
+        # Failures above are not cached, so the next call retries
+        self._cache_put(key, results)
+        return results
+    
+    async def search_many(self, queries: List[str], max_results: Optional[int] = None,
+                          max_concurrent: int = 8) -> List[List[SearchResult]]:
+        """
+        Search several queries concurrently, results in query order.
+        
+        Uses one aiohttp connection pool when aiohttp is installed, otherwise
+        runs search() in threads over the pooled requests session.
+        """
+        if not HAS_DEPS:
+            return [[] for _ in queries]
+        
+        limit = max_results or self.max_results
+        
+        if not HAS_AIOHTTP:
+            gate = asyncio.Semaphore(max_concurrent)
+            
+            async def search_one(query: str) -> List[SearchResult]:
+                async with gate:
+                    return await asyncio.to_thread(self.search, query, limit)
+            
+            return list(await asyncio.gather(*[search_one(q) for q in queries]))
+        
+        connector = aiohttp.TCPConnector(limit=max_concurrent, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(
+            connector=connector,
+            headers=self.HEADERS,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as session:
+            return list(await asyncio.gather(*[self._fetch(session, q, limit) for q in queries]))
+    
+    def search_batch(self, queries: List[str], max_results: Optional[int] = None,
+                     max_concurrent: int = 8) -> List[List[SearchResult]]:
+        """Blocking wrapper around search_many (not for use inside a running event loop)."""
+        return asyncio.run(self.search_many(queries, max_results, max_concurrent))
+    
+    async def _fetch(self, session: "aiohttp.ClientSession", query: str,
+                     limit: int) -> List[SearchResult]:
+        """One search over an aiohttp session, sharing search()'s cache."""
+        key = (query, limit)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return list(cached)
+        
+        try:
+            async with session.post(self.SEARCH_URL, data={"q": query, "b": ""}) as response:
+                response.raise_for_status()
+                html = await response.text()
+            results = self._parse_results(html, limit)
         except Exception as e:
             print(f"Web search error: {e}")
             return []
+        
+        self._cache_put(key, results)
+        return results
     
     def _parse_results(self, html: str, limit: int) -> List[SearchResult]:
         """Parse search results from HTML."""
-        soup = BeautifulSoup(html, "html.parser")
+        head = _results_prefix(html, limit)
+        results = self._parse_html(head, limit)
+        if len(results) < limit and head is not html:
+            # Some containers in the head were skipped (no title or URL)
+            results = self._parse_html(html, limit)
+        return results
+    
+    def _parse_html(self, html: str, limit: int) -> List[SearchResult]:
+        """Parse with the fastest installed parser."""
+        if HAS_SELECTOLAX:
+            return self._parse_results_lexbor(html, limit)
+        if HAS_LXML:
+            return self._parse_results_lxml(html, limit)
+        return self._parse_results_bs4(html, limit)
+    
+    def _parse_results_lexbor(self, html: str, limit: int) -> List[SearchResult]:
+        """
+        Parse results with selectolax's lexbor backend.
+        
+        The DOM stays in C; Python objects are only created for the nodes
+        read here, unlike BeautifulSoup's full Python tree.
+        """
+        tree = LexborHTMLParser(html)
+        results = []
+        
+        for result in tree.css(".result"):
+            if len(results) >= limit:
+                break
+            
+            title_elem = result.css_first(".result__a")
+            if title_elem is None:
+                continue
+            
+            title = title_elem.text(deep=True, separator="", strip=True)
+            href = title_elem.attributes.get("href") or ""
+            url = self._extract_url(href)
+            
+            if not url:
+                continue
+            
+            snippet_elem = result.css_first(".result__snippet")
+            snippet = snippet_elem.text(deep=True, separator="", strip=True) if snippet_elem is not None else ""
+            
+            results.append(SearchResult(title=title, url=url, snippet=snippet))
+        
+        return results
+    
+    def _parse_results_lxml(self, html: str, limit: int) -> List[SearchResult]:
+        """Parse results with lxml and precompiled XPath, no BeautifulSoup wrappers."""
+        tree = lxml_html.fromstring(html)
+        results = []
+        
+        for result in _RESULT_XPATH(tree):
+            if len(results) >= limit:
+                break
+            
+            title_elems = _TITLE_XPATH(result)
+            if not title_elems:
+                continue
+            
+            title = self._element_text(title_elems[0])
+            href = title_elems[0].get("href") or ""
+            url = self._extract_url(href)
+            
+            if not url:
+                continue
+            
+            snippet_elems = _SNIPPET_XPATH(result)
+            snippet = self._element_text(snippet_elems[0]) if snippet_elems else ""
+            
+            results.append(SearchResult(title=title, url=url, snippet=snippet))
+        
+        return results
+    
+    @staticmethod
+    def _element_text(element) -> str:
+        """Text of an lxml element the way bs4's get_text(strip=True) joins it."""
+        return "".join(t.strip() for t in element.itertext())
+    
+    def _parse_results_bs4(self, html: str, limit: int) -> List[SearchResult]:
+        """Parse results with BeautifulSoup (fallback when selectolax is missing)."""
+        soup = BeautifulSoup(html, "lxml" if HAS_LXML else "html.parser")
         results = []
         
         for result in soup.select(".result"):
@@ -100,14 +377,17 @@ class WebSearch:
         if not href:
             return None
         
-        match = re.search(r'uddg=([^&]+)', href)
-        if match:
-            return urllib.parse.unquote(match.group(1))
+        # Direct links skip the regex entirely
+        if "uddg=" not in href:
+            return href if href.startswith("http") else None
         
-        if href.startswith("http"):
-            return href
+        match = _UDDG_RE.search(href)
+        if match:
+            raw = match.group(1)
+            # Unescaped payloads (the common case) need no decoding
+            return raw if "%" not in raw else urllib.parse.unquote(raw)
         
-        return None
+        return href if href.startswith("http") else None
     
     def search_formatted(self, query: str, max_results: Optional[int] = None) -> str:
         """Search and return formatted markdown."""
@@ -116,12 +396,14 @@ class WebSearch:
         if not results:
             return f"No web results found for: {query}"
         
-        lines = [f"**Web results for: {query}**\n"]
-        
+        return "\n".join(self._format_lines(query, results))
+    
+    @staticmethod
+    def _format_lines(query: str, results: List[SearchResult]) -> Iterator[str]:
+        """Markdown lines for search_formatted."""
+        yield f"**Web results for: {query}**\n"
         for i, r in enumerate(results, 1):
-            lines.append(f"{i}. **[{r.title}]({r.url})**")
+            yield f"{i}. **[{r.title}]({r.url})**"
             if r.snippet:
-                lines.append(f"   {r.snippet}\n")
-        
-        return "\n".join(lines)
+                yield f"   {r.snippet}\n"
 